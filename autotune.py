@@ -0,0 +1,190 @@
+"""
+Adaptive worker count for batches.
+
+A sheet is decoded, rendered and written by one worker, so the knob is the
+number of sheets in flight. run_batch(tuner=...) reports every sheet's wall
+and CPU time; after each window of sheets the tuner looks at
+
+    sheets/s     throughput of the window
+    CPU          process CPU time / (wall time x cores)
+    I/O wait     share of the workers' time not spent on their own CPU
+                 (blocked reading the sheet or writing pages, mostly)
+
+and hill-climbs: one worker more (or less) while throughput improves,
+back to the better setting once it stops. A CPU-bound run (local NVMe)
+settles near the core count, an I/O-bound one (SMB share) higher. The
+ceiling keeps every worker's decoded sheet and pooled canvases within half
+the RAM; it is also the size of the shared worker pool.
+
+The chosen setting is saved per output folder under "autotune" in
+gtcrop_config.json and is the starting point of the next batch there.
+"""
+import os
+import sys
+import time
+import threading
+from time import perf_counter
+
+from config import load_config, update_config
+from batch import default_workers
+
+# Memory a worker holds at its peak (decoded 12x24" sheet, crop, resized
+# half, page canvas, encoder buffer)
+worker_memory = 300 * 2 ** 20
+# Plus what its thread keeps between sheets for the whole session: the
+# BufferPool and Compositor canvases (13x19" pages)
+worker_buffers = 350 * 2 ** 20
+
+_improvement = 0.05  # throughput change that counts as better / worse
+_drift = 0.25        # drop after settling that restarts the search
+
+
+def total_memory():
+    """Physical RAM in bytes, None if unknown."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong)] + [
+                    (name, ctypes.c_ulonglong) for name in (
+                        "ullTotalPhys", "ullAvailPhys", "ullTotalPageFile", "ullAvailPageFile",
+                        "ullTotalVirtual", "ullAvailVirtual", "ullAvailExtendedVirtual")]
+
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(status)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullTotalPhys
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def worker_limit():
+    """Most workers worth trying: twice the cores, within half the RAM."""
+    limit = min(16, 2 * (os.cpu_count() or 1))
+    memory = total_memory()
+    if memory:
+        limit = min(limit, memory // 2 // (worker_memory + worker_buffers))
+    return max(1, limit)
+
+
+def _folder_key(output_folder):
+    return os.path.normcase(os.path.abspath(output_folder))
+
+
+def saved_setting(output_folder):
+    """The last tuned setting for output_folder ({} if none)."""
+    return load_config().get("autotune", {}).get(_folder_key(output_folder), {})
+
+
+class WorkerTuner:
+    """
+    Hill-climbs the number of sheets in flight during one batch. `workers`
+    is read by run_batch before every dispatch; observe() is called from
+    the worker threads.
+    """
+
+    def __init__(self, output_folder=None, start=None, max_workers=None):
+        self.output_folder = output_folder
+        self.max_workers = max_workers or worker_limit()
+        saved = saved_setting(output_folder) if output_folder else {}
+        start = start or saved.get("workers") or default_workers
+        self.workers = max(1, min(self.max_workers, start))
+        self.history = []     # (workers, sheets/s, CPU, I/O wait) per window
+        self._lock = threading.Lock()
+        self._direction = None  # +1 / -1 while searching, 0 once settled
+        self._previous = None   # (workers, sheets/s) of the last window
+        self._settled_rate = None
+        self._new_window()
+
+    def _new_window(self):
+        self._sheets = 0
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._start = perf_counter()
+        self._process_cpu = time.process_time()
+
+    def observe(self, wall_seconds, cpu_seconds):
+        """One finished sheet: its wall time and its worker thread's CPU time."""
+        with self._lock:
+            self._sheets += 1
+            self._wall += wall_seconds
+            self._cpu += cpu_seconds
+            # A window covers every worker at least twice
+            if self._sheets >= max(4, 2 * self.workers):
+                self._step()
+
+    def _step(self):
+        elapsed = perf_counter() - self._start
+        if elapsed <= 0:
+            return
+        rate = self._sheets / elapsed
+        cpu = (time.process_time() - self._process_cpu) / elapsed / (os.cpu_count() or 1)
+        io_wait = max(0.0, 1 - self._cpu / self._wall) if self._wall else 0.0
+        self.history.append((self.workers, rate, cpu, io_wait))
+        self._new_window()
+
+        if self._direction is None:
+            # First window: more workers only help if they'd have something to do
+            self._direction = 1 if cpu < 0.85 or io_wait > 0.25 else -1
+            self._move(rate)
+            return
+        if self._direction == 0:
+            if rate < self._settled_rate * (1 - _drift):
+                # Conditions changed (share busier, other load); search again from here
+                self._direction = 1 if io_wait > 0.25 else -1
+                self._move(rate)
+            return
+
+        last_workers, last_rate = self._previous
+        if rate > last_rate * (1 + _improvement):
+            self._move(rate)
+        elif rate < last_rate * (1 - _improvement):
+            self._settle(last_workers, last_rate)
+        else:
+            # Same throughput: take the setting that holds less memory
+            self._settle(min(last_workers, self.workers), max(rate, last_rate))
+
+    def _move(self, rate):
+        self._previous = (self.workers, rate)
+        workers = self.workers + self._direction
+        if not 1 <= workers <= self.max_workers:
+            self._settle(self.workers, rate)
+            return
+        self.workers = workers
+
+    def _settle(self, workers, rate):
+        self._direction = 0
+        self.workers = workers
+        self._settled_rate = rate
+
+    def summary(self):
+        if not self.history:
+            return f"Workers: {self.workers} (batch too short to tune)"
+        steps = []  # one entry per setting tried, in order
+        for w, r, _, _ in self.history:
+            if steps and steps[-1][0] == w:
+                steps[-1][1] = max(steps[-1][1], r)
+            else:
+                steps.append([w, r])
+        steps = " → ".join(f"{w}: {r:.2f}/s" for w, r in steps)
+        _, _, cpu, io_wait = self.history[-1]
+        return f"Workers: {self.workers} (CPU {cpu:.0%}, I/O wait {io_wait:.0%}; {steps})"
+
+    def save(self):
+        """Remembers the chosen setting for the output folder."""
+        if not self.output_folder or not self.history:
+            return
+        rates = [r for w, r, _, _ in self.history if w == self.workers]
+        _, _, cpu, io_wait = self.history[-1]
+        with self._lock:
+            setting = {
+                "workers": self.workers,
+                "sheets_per_sec": round(max(rates) if rates else self.history[-1][1], 3),
+                "cpu": round(cpu, 2), "io_wait": round(io_wait, 2),
+                "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        settings = load_config().get("autotune", {})
+        settings[_folder_key(self.output_folder)] = setting
+        update_config(autotune=settings)
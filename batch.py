@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bufferpool import configure_image_memory
+
+# Pillow releases the GIL while decoding, resampling and encoding, so threads
+# scale well. Each worker holds a decoded sheet (~100 MB for 12x24"), which
+# is what keeps the default low.
+default_workers = max(1, min(4, os.cpu_count() or 1))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers=None):
+    """
+    The shared worker pool. It is created once, as large as
+    autotune.worker_limit() allows (or `workers`, if more), and lives for the
+    whole session so every worker thread keeps its BufferPool (and warm
+    canvases) from one batch to the next. It is never replaced: the job
+    queue and running batches hold on to it. Callers limit how many of their
+    tasks are in flight themselves (see map_limited); threads are only
+    started as that many tasks come in.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from autotune import worker_limit  # autotune imports this module
+            configure_image_memory()
+            _executor = ThreadPoolExecutor(max_workers=max(worker_limit(), workers or default_workers),
+                                           thread_name_prefix="gtcrop-worker")
+        return _executor
+
+
+def map_limited(func, items, workers=None):
+    """
+    [func(item) for item in items] on the shared worker pool, at most
+    `workers` calls at a time. Like executor.map(), an exception is raised
+    by the call whose result it is.
+    """
+    slots = threading.BoundedSemaphore(workers or default_workers)
+    executor = get_executor(workers)
+    futures = []
+    for item in items:
+        slots.acquire()
+        future = executor.submit(func, item)
+        future.add_done_callback(lambda f: slots.release())
+        futures.append(future)
+    return [f.result() for f in futures]
+
+
+def run_batch(func, paths, output_folder, workers=None, on_result=None, profiler=None, sink=None,
+              verifier=None, tuner=None):
+    """
+    Runs func(path, output_folder) -> (success, msg) for every path on the
+    shared worker pool. An item may also be a (path, page) pair for one page
+    of a multi-page file, func is then called with page=page.
+
+    on_result(done, total, path, success, msg) is called from the worker
+    threads as sheets finish. Returns [(item, success, msg), ...] in input order.
+
+    With a started profiler.BatchProfiler as `profiler`, every sheet is
+    profiled on its worker thread; the caller saves the profile afterwards.
+
+    With an output sink (see outputs.py), func is called with sink=sink and
+    the sink is told the album order up front; the caller closes it.
+
+    With a verify.Verifier, the files of every successful sheet are checked
+    while the batch goes on, and sheets whose input or pages fail the
+    check are returned as failures.
+
+    With an autotune.WorkerTuner, the number of sheets in flight follows
+    tuner.workers (instead of `workers`) as it learns from the batch.
+    """
+    paths = list(paths)
+    total = len(paths)
+    results = [None] * total
+    done = [0]
+    lock = threading.Lock()
+    checks = {}
+
+    def run_one(index, item):
+        if isinstance(item, tuple):
+            path, page = item
+        else:
+            path, page = item, None
+        kwargs = {} if sink is None else {"sink": sink}
+        if page is not None:
+            kwargs["page"] = page
+        try:
+            success, msg = func(path, output_folder, **kwargs)
+        except Exception as e:
+            success, msg = False, f"Error: {e}"
+        if sink is not None and not success:
+            sink.skip((path, page))
+        if verifier is not None and success:
+            checks[index] = verifier.submit(path, page, output_folder)
+        results[index] = (item, success, msg)
+        with lock:
+            done[0] += 1
+            count = done[0]
+        if on_result:
+            on_result(count, total, path, success, msg)
+
+    if profiler is not None:
+        run_one = profiler.wrap(run_one)
+    if sink is not None:
+        sink.begin(p if isinstance(p, tuple) else (p, None) for p in paths)
+
+    inflight = [0]
+    slot_free = threading.Condition()
+
+    def run_gated(index, item):
+        start = perf_counter()
+        cpu = time.thread_time()
+        try:
+            run_one(index, item)
+        finally:
+            if tuner is not None:
+                tuner.observe(perf_counter() - start, time.thread_time() - cpu)
+            with slot_free:
+                inflight[0] -= 1
+                slot_free.notify()
+
+    executor = get_executor(tuner.max_workers if tuner is not None else workers)
+    futures = []
+    for i, p in enumerate(paths):
+        with slot_free:
+            while inflight[0] >= (tuner.workers if tuner is not None else workers or default_workers):
+                slot_free.wait()
+            inflight[0] += 1
+        futures.append(executor.submit(run_gated, i, p))
+    for f in futures:
+        f.result()
+
+    if verifier is not None:
+        for index, problem in verifier.wait(checks).items():
+            if problem:
+                item, _, msg = results[index]
+                results[index] = (item, False, f"{msg} ⚠️ Verify: {problem}")
+    return results
+
@@ -0,0 +1,113 @@
+import threading
+import weakref
+
+import numpy as np
+from PIL import Image
+
+# Bytes per pixel of the buffer modes the pool hands out
+_channels = {"L": 1, "RGB": 3, "RGBX": 4, "RGBA": 4}
+
+
+class BufferPool:
+    """
+    Recycles page-sized NumPy buffers keyed by (mode, size).
+
+    Albums are nearly always a single sheet size, so after the first sheet
+    every acquire() is a hit and no new canvas memory is allocated. Released
+    buffers keep their old pixels; the `tag` passed to release() travels with
+    the buffer so a caller can tell whether it still holds what it needs
+    (the compositor uses the PageLayout to skip repainting borders).
+    """
+
+    def __init__(self, max_per_key=2, max_bytes=512 * 1024 * 1024):
+        self.max_per_key = max_per_key
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        self._free = {}   # (mode, size) -> [(buf, tag), ...]
+        self._pooled_bytes = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, mode, size, tag=None):
+        """Returns (buf, tag). tag is whatever the buffer was released with, None if new."""
+        key = (mode, tuple(size))
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                # Prefer a buffer that was last used for the same purpose
+                idx = next((i for i, (_, t) in enumerate(free) if t == tag), len(free) - 1)
+                buf, old_tag = free.pop(idx)
+                self._pooled_bytes -= buf.nbytes
+                self.hits += 1
+                return buf, old_tag
+            self.misses += 1
+
+        w, h = key[1]
+        return np.empty((h, w, _channels[mode]), dtype=np.uint8), None
+
+    def release(self, mode, buf, tag=None):
+        key = (mode, (buf.shape[1], buf.shape[0]))
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) >= self.max_per_key or self._pooled_bytes + buf.nbytes > self.max_bytes:
+                self.dropped += 1
+                return
+            free.append((buf, tag))
+            self._pooled_bytes += buf.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self._pooled_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "dropped": self.dropped,
+                "pooled_buffers": sum(len(v) for v in self._free.values()),
+                "pooled_bytes": self._pooled_bytes,
+            }
+
+
+_local = threading.local()
+_all_pools = weakref.WeakSet()  # a pool goes away with its worker thread
+_all_pools_lock = threading.Lock()
+
+
+def worker_pool():
+    """The BufferPool of the calling thread (one per batch worker)."""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = BufferPool()
+        with _all_pools_lock:
+            _all_pools.add(pool)
+    return pool
+
+
+def configure_image_memory(blocks_max=32, block_size=None):
+    """
+    Lets Pillow keep freed memory blocks for reuse instead of returning them
+    to the OS. Decodes, crops and resize results are the same size sheet
+    after sheet, so those intermediates get recycled too. With the default
+    16 MB blocks, 32 blocks caps the cache at 512 MB.
+    """
+    if block_size:
+        Image.core.set_block_size(block_size)
+    Image.core.set_blocks_max(blocks_max)
+
+
+def pool_stats():
+    """Totals over the live worker pools plus Pillow's own block reuse counters."""
+    totals = {"hits": 0, "misses": 0, "dropped": 0, "pooled_buffers": 0, "pooled_bytes": 0}
+    with _all_pools_lock:
+        pools = list(_all_pools)
+    for pool in pools:
+        for k, v in pool.stats().items():
+            totals[k] += v
+    image_stats = Image.core.get_stats()
+    totals["image_blocks_allocated"] = image_stats["allocated_blocks"]
+    totals["image_blocks_reused"] = image_stats["reused_blocks"]
+    return totals
@@ -0,0 +1,155 @@
+import io
+import hashlib
+import threading
+from time import perf_counter
+
+from PIL import ImageCms
+
+from config import load_config
+
+# Rendering intents by name (LittleCMS numbering)
+intents = {"perceptual": 0, "relative": 1, "saturation": 2, "absolute": 3}
+
+# "preserve": RGB sheets keep their own profile (embedded in the pages as is),
+#             CMYK and grayscale sheets are converted to sRGB through their profile
+# "srgb":     every profiled sheet is converted to sRGB
+color_modes = ("preserve", "srgb")
+
+_settings = {}
+_srgb = {}
+_transforms = {}  # (profile sha1, source mode, target, intent) -> ImageCmsTransform
+_lock = threading.Lock()
+
+
+def configure(mode=None, intent=None):
+    """
+    Sets the color policy for the session. Missing values come from the
+    "color_mode" / "color_intent" settings in gtcrop_config.json.
+    """
+    config = load_config()
+    mode = mode or config.get("color_mode", "preserve")
+    intent = intent or config.get("color_intent", "perceptual")
+    if mode not in color_modes:
+        raise ValueError(f"Unknown color mode: {mode}")
+    if intent not in intents:
+        raise ValueError(f"Unknown rendering intent: {intent}")
+    with _lock:
+        _settings.update(mode=mode, intent=intent)
+
+
+def _policy():
+    if not _settings:
+        configure()
+    return _settings["mode"], _settings["intent"]
+
+
+def _srgb_profile():
+    with _lock:
+        if not _srgb:
+            profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB"))
+            _srgb.update(profile=profile, icc=profile.tobytes())
+        return _srgb["profile"], _srgb["icc"]
+
+
+def get_transform(icc_profile, in_mode, target="srgb", intent="perceptual"):
+    """
+    Transform from the embedded profile `icc_profile` (bytes) to `target`,
+    built once per session and shared by all worker threads. Sheets of one
+    album nearly always carry the same profile, so this runs once per album.
+    """
+    key = (hashlib.sha1(icc_profile).hexdigest(), in_mode, target, intent)
+    with _lock:
+        transform = _transforms.get(key)
+    if transform is not None:
+        color_stats.add(hits=1)
+        return transform
+
+    # Built outside the lock (tens of ms); two threads racing on a new
+    # profile both build it and the first one is kept
+    source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+    target_profile, _ = _srgb_profile()
+    transform = ImageCms.buildTransform(source, target_profile, in_mode, "RGB",
+                                        renderingIntent=intents[intent])
+    with _lock:
+        transform = _transforms.setdefault(key, transform)
+    color_stats.add(builds=1)
+    return transform
+
+
+def clear_transforms():
+    with _lock:
+        _transforms.clear()
+
+
+# Source modes by the mode their profile describes; alpha and palettes are
+# dropped first, as to_rgb() does
+_profile_modes = {"RGB": "RGB", "RGBA": "RGB", "P": "RGB", "CMYK": "CMYK", "L": "L", "LA": "L"}
+
+
+def manage(img):
+    """
+    Color-manages a freshly opened sheet. Returns an RGB image whose
+    info["icc_profile"] describes its pixels, or None when the sheet has no
+    usable profile and should take the plain to_rgb() path.
+    """
+    icc_profile = img.info.get("icc_profile")
+    base = _profile_modes.get(img.mode)
+    if not icc_profile or base is None:
+        return None
+    mode, intent = _policy()
+    start = perf_counter()
+    if img.mode != base:
+        img = img.convert(base)  # keeps info, so the profile comes along
+    if base == "RGB" and mode == "preserve":
+        img.load()
+        return img
+
+    try:
+        transform = get_transform(icc_profile, base, "srgb", intent)
+    except (OSError, ImageCms.PyCMSError):
+        return None  # broken profile, fall back to a plain conversion
+    if img.mode == "RGB":
+        # Freshly decoded (or converted) pixels belong to us, so transform them in place
+        img.load()
+        ImageCms.applyTransform(img, transform, inPlace=True)
+    else:
+        img = ImageCms.applyTransform(img, transform)
+    img.info["icc_profile"] = _srgb_profile()[1]
+    color_stats.add(managed_pixels=img.width * img.height, managed_seconds=perf_counter() - start)
+    return img
+
+
+class ColorStats:
+    """Throughput of managed conversions next to the plain convert("RGB") path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.managed_pixels = 0
+            self.managed_seconds = 0.0
+            self.plain_pixels = 0
+            self.plain_seconds = 0.0
+            self.builds = 0
+            self.hits = 0
+
+    def add(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self):
+        def rate(pixels, seconds):
+            if not pixels:
+                return "-"
+            return f"{pixels / 1e6 / max(seconds, 1e-9):.0f} MP/s"
+        return (
+            f"Color: managed {self.managed_pixels / 1e6:.0f} MP at {rate(self.managed_pixels, self.managed_seconds)} "
+            f"({self.builds} transforms built, {self.hits} reused), "
+            f"plain {self.plain_pixels / 1e6:.0f} MP at {rate(self.plain_pixels, self.plain_seconds)}"
+        )
+
+
+color_stats = ColorStats()
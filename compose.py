@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from bufferpool import worker_pool
+
+# Pages are composed in RGBX buffers: Pillow can wrap those without copying
+# (RGB is stored as 4 bytes per pixel internally) and JPEG encodes them as RGB.
+_mode = "RGBX"
+_channels = 4
+
+
+def _border_regions(layout):
+    """Slices of the canvas outside the pasted image: top, bottom, left, right."""
+    canvas_w, canvas_h = layout.canvas_size
+    im_w, im_h = layout.image_size
+    x, y = layout.offset
+    return [
+        (slice(0, y), slice(0, canvas_w)),
+        (slice(y + im_h, canvas_h), slice(0, canvas_w)),
+        (slice(y, y + im_h), slice(0, x)),
+        (slice(y, y + im_h), slice(x + im_w, canvas_w)),
+    ]
+
+
+def prepare_buffer(layout, buf=None):
+    """
+    Paints the static parts of a page (white border + margin lines) into `buf`,
+    allocating it if needed. The image area is left untouched since every
+    compose() overwrites it anyway.
+    """
+    canvas_w, canvas_h = layout.canvas_size
+    if buf is None:
+        buf = np.empty((canvas_h, canvas_w, _channels), dtype=np.uint8)
+    for rows, cols in _border_regions(layout):
+        buf[rows, cols] = 255
+    for x0, y0, x1, y1 in layout.mark_lines:
+        buf[y0:y1, x0:x1, :3] = 0
+    return buf
+
+
+def wrap_buffer(buf):
+    """Pillow image sharing memory with an RGBX buffer (no copy)."""
+    h, w = buf.shape[:2]
+    return Image.frombuffer(_mode, (w, h), buf, "raw", _mode, 0, 1)
+
+
+class Compositor:
+    """
+    Places resized halves on their output page using one buffer per
+    PageLayout. Sheets in an album almost always share a layout, so after the
+    first page only the image area is written. Buffers come from (and go back
+    to) the worker's BufferPool.
+
+    Not thread-safe, use get_compositor() to get the one for the current thread.
+    """
+
+    def __init__(self, pool=None, max_layouts=2):
+        self.pool = pool if pool is not None else worker_pool()
+        self.max_layouts = max_layouts
+        self._buffers = OrderedDict()
+
+    def _buffer(self, layout):
+        buf = self._buffers.get(layout)
+        if buf is not None:
+            self._buffers.move_to_end(layout)
+            return buf
+        buf, tag = self.pool.acquire(_mode, layout.canvas_size, tag=layout)
+        if tag != layout:
+            prepare_buffer(layout, buf)
+        self._buffers[layout] = buf
+        while len(self._buffers) > self.max_layouts:
+            old_layout, old_buf = self._buffers.popitem(last=False)
+            self.pool.release(_mode, old_buf, tag=old_layout)
+        return buf
+
+    def release_all(self):
+        """Hands every buffer back to the pool (e.g. at the end of a batch)."""
+        while self._buffers:
+            layout, buf = self._buffers.popitem(last=False)
+            self.pool.release(_mode, buf, tag=layout)
+
+    def compose(self, layout, im):
+        """
+        Returns the finished page for `im` (the resized half, RGB or RGBX).
+        The returned image is a view on the layout's buffer: save it before
+        composing the next page with the same layout.
+        """
+        buf = self._buffer(layout)
+        x, y = layout.offset
+        im_w, im_h = layout.image_size
+        buf[y:y + im_h, x:x + im_w, :3] = np.asarray(im)[..., :3]
+        return wrap_buffer(buf)
+
+
+_local = threading.local()
+
+
+def get_compositor():
+    compositor = getattr(_local, "compositor", None)
+    if compositor is None:
+        compositor = _local.compositor = Compositor(worker_pool())
+    return compositor
@@ -0,0 +1,30 @@
+import os
+import json
+import threading
+
+config_file = "gtcrop_config.json"
+
+_lock = threading.Lock()
+
+
+def load_config():
+    """Settings saved in gtcrop_config.json ({} if missing or unreadable)."""
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, "r") as f:
+                return json.load(f)
+    except:
+        pass
+    return {}
+
+
+def update_config(**values):
+    """Saves `values` into gtcrop_config.json, keeping the other settings."""
+    with _lock:
+        config = load_config()
+        config.update(values)
+        try:
+            with open(config_file, "w") as f:
+                json.dump(config, f)
+        except:
+            pass
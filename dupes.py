@@ -0,0 +1,115 @@
+import numpy as np
+from PIL import Image
+
+from inputs import open_preview
+from batch import map_limited
+
+# Hamming distance (out of 64 bits) up to which two sheets count as the same
+# spread: 0 is an identical image, re-saved or slightly recompressed copies
+# stay well under the default
+near_duplicate_distance = 8
+
+_hash_size = 32
+_low = 8
+
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2)
+    return m * np.sqrt(2 / n)
+
+
+_dct = _dct_matrix(_hash_size)
+
+
+def phash(img):
+    """64-bit perceptual hash (DCT of a 32x32 grayscale image, low 8x8 frequencies vs their median)."""
+    small = img.convert("L").resize((_hash_size, _hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.float64)
+    low = (_dct @ pixels @ _dct.T)[:_low, :_low].flatten()
+    # The DC term is the average brightness, leave it out of the median
+    bits = low > np.median(low[1:])
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def sheet_phash(path, page=None):
+    """pHash of one sheet from a reduced draft decode."""
+    return phash(open_preview(path, page, max_size=(128, 128), mode="L"))
+
+
+def hash_sheets(sheets, cache=None, workers=None):
+    """
+    pHashes of [(path, page), ...] on the shared worker pool, reusing the
+    ones in `cache` (a ValidationCache). Returns [((path, page), hash), ...]
+    in input order; unreadable sheets are left out.
+    """
+    def one(sheet):
+        path, page = sheet
+        if cache is not None:
+            cached = cache.get(path, page, "phash")
+            if cached is not None:
+                return sheet, int(cached, 16)
+        try:
+            h = sheet_phash(path, page)
+        except Exception:
+            return sheet, None
+        if cache is not None:
+            cache.put(path, page, phash=f"{h:016x}")
+        return sheet, h
+
+    results = map_limited(one, sheets, workers)
+    return [(sheet, h) for sheet, h in results if h is not None]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over Hamming distance. The 64 bits are cut into
+    radius + 1 chunks with a lookup table each; two hashes within `radius`
+    must agree exactly on at least one chunk (pigeonhole), so a query only
+    compares against sheets sharing a chunk instead of the whole album.
+    (A BK-tree was tried first: at radius 8 on 64 bits it still visits
+    nearly every node.)
+    """
+
+    def __init__(self, radius):
+        self.radius = radius
+        n = radius + 1
+        bounds = [round(i * 64 / n) for i in range(n + 1)]
+        self._chunks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._tables = [{} for _ in self._chunks]
+
+    def add(self, h, item):
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            table.setdefault((h >> shift) & mask, []).append((h, item))
+
+    def search(self, h):
+        """[(distance, item), ...] for every stored hash within the radius."""
+        found = {}
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            for other, item in table.get((h >> shift) & mask, ()):
+                if id(item) not in found:
+                    d = hamming(h, other)
+                    if d <= self.radius:
+                        found[id(item)] = (d, item)
+        return list(found.values())
+
+
+def find_duplicates(hashes, max_distance=near_duplicate_distance):
+    """
+    `hashes` is [(item, hash), ...] in album order. Returns the flagged
+    pairs [(item_a, item_b, distance), ...], each pair once, closest first.
+    """
+    index = MultiIndexHash(max_distance)
+    pairs = []
+    for item, h in hashes:
+        # Only earlier sheets are indexed, so every pair is found once
+        for distance, other in index.search(h):
+            pairs.append((other, item, distance))
+        index.add(h, item)
+    pairs.sort(key=lambda p: p[2])
+    return pairs
@@ -0,0 +1,209 @@
+import os
+import importlib.util
+from time import perf_counter
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+from scanner import image_extensions
+from colormgmt import manage, color_stats
+
+# PDF pages are rendered with pypdfium2; without it PDFs aren't offered at all
+pdf_support = importlib.util.find_spec("pypdfium2") is not None
+
+# Everything GT Crop accepts as input. Multi-page TIFF and PDF files count as
+# one sheet per page; a PSD is read as its flattened composite.
+multi_page_extensions = {'.tif', '.tiff'} | ({'.pdf'} if pdf_support else set())
+sheet_extensions = image_extensions | multi_page_extensions | {'.psd'}
+
+# File dialog filter matching sheet_extensions
+sheet_filetypes = [("Image files", "*.jpg *.jpeg *.png *.tif *.tiff *.psd" + (" *.pdf" if pdf_support else ""))]
+
+# PDF pages are rasterized at this resolution (matches processor.dpi)
+pdf_dpi = 300
+dpi_tolerance = 5  # stored DPI this close to 300 counts as 300
+
+# One sheet inside an input file. `page` is None for single-image files.
+SheetPage = namedtuple("SheetPage", ["path", "page", "size"])
+
+
+def _is_pdf(path):
+    return os.path.splitext(path)[1].lower() == '.pdf'
+
+
+def _open_pdf(path):
+    try:
+        import pypdfium2
+    except ImportError:
+        raise ValueError("PDF input needs the pypdfium2 package (pip install pypdfium2)")
+    return pypdfium2.PdfDocument(path)
+
+
+def _pdf_page_size(page):
+    w_pt, h_pt = page.get_size()
+    return round(w_pt / 72 * pdf_dpi), round(h_pt / 72 * pdf_dpi)
+
+
+def list_pages(path):
+    """
+    Lists the sheets in `path` from the file headers only, nothing is decoded.
+    Single-image files give one SheetPage with page=None.
+    """
+    if _is_pdf(path):
+        doc = _open_pdf(path)
+        try:
+            return [SheetPage(path, i, _pdf_page_size(doc[i])) for i in range(len(doc))]
+        finally:
+            doc.close()
+
+    with Image.open(path) as img:
+        n_frames = getattr(img, "n_frames", 1)
+        if img.format != "TIFF" or n_frames == 1:
+            return [SheetPage(path, None, img.size)]
+        pages = []
+        for i in range(n_frames):
+            img.seek(i)
+            pages.append(SheetPage(path, i, img.size))
+        return pages
+
+
+def to_rgb(img):
+    """
+    Converts any supported source mode to 8-bit RGB in a single pass.
+    RGB input is returned as is (convert() would copy it).
+    """
+    if img.mode == "RGB":
+        img.load()
+        return img
+    if img.mode in ("I;16", "I;16L", "I;16B", "I;16N", "I"):
+        # 16-bit grayscale: keep the top 8 bits instead of clipping at 255
+        arr = np.asarray(img)
+        if img.mode == "I":
+            arr = np.clip(arr, 0, 65535)
+        return Image.fromarray((arr >> 8).astype(np.uint8), "L").convert("RGB")
+    return img.convert("RGB")
+
+
+def _detach(result, img):
+    """
+    Closes the file of the opened image `img` once `result` is decoded. A
+    multi-page TIFF keeps its file open after load(), so a page that is
+    still `img` itself is copied first; don't wait for the GC.
+    """
+    if result is img:
+        if getattr(img, "n_frames", 1) == 1:
+            return img  # single-frame files are closed by load()
+        result = img.copy()
+    img.close()
+    return result
+
+
+def open_sheet(path, page=None):
+    """
+    Decodes one sheet (a page of a multi-page file, or the whole image) as RGB.
+    Embedded ICC profiles are honoured (see colormgmt); info["icc_profile"]
+    of the result is the profile to embed in the pages, if any.
+    """
+    if _is_pdf(path):
+        doc = _open_pdf(path)
+        try:
+            pdf_page = doc[page or 0]
+            img = pdf_page.render(scale=pdf_dpi / 72).to_pil()
+            # pdfium rounds up, trim the extra pixel so sizes match the page box
+            w_px, h_px = _pdf_page_size(pdf_page)
+            if img.size != (w_px, h_px):
+                img = img.crop((0, 0, min(w_px, img.width), min(h_px, img.height)))
+            return to_rgb(img)
+        finally:
+            doc.close()
+
+    img = Image.open(path)
+    if page:
+        img.seek(page)
+    managed = manage(img)
+    if managed is not None:
+        return _detach(managed, img)
+    if img.mode == "RGB":
+        return _detach(to_rgb(img), img)
+    start = perf_counter()
+    rgb = _detach(to_rgb(img), img)
+    # convert() copies info, a leftover CMYK/gray profile would be wrong for RGB pixels
+    rgb.info.pop("icc_profile", None)
+    color_stats.add(plain_pixels=rgb.width * rgb.height, plain_seconds=perf_counter() - start)
+    return rgb
+
+
+def open_preview(path, page=None, max_size=(512, 512), mode="RGB"):
+    """
+    Decodes a small version of one sheet, fitting in max_size, for hashing
+    and previews. JPEGs use a draft (DCT-scaled) decode and PDF pages are
+    rendered at the reduced scale, so a full-size sheet is never decoded.
+    No color management: this is for looking at, not for printing.
+    """
+    if _is_pdf(path):
+        doc = _open_pdf(path)
+        try:
+            pdf_page = doc[page or 0]
+            w_pt, h_pt = pdf_page.get_size()
+            scale = min(max_size[0] / w_pt, max_size[1] / h_pt)
+            img = pdf_page.render(scale=scale).to_pil()
+        finally:
+            doc.close()
+    else:
+        img = Image.open(path)
+        if page:
+            img.seek(page)
+        img.draft(mode, max_size)
+        if img.mode != mode:
+            img = to_rgb(img) if mode == "RGB" else to_rgb(img).convert(mode)
+    img.thumbnail(max_size, Image.Resampling.BILINEAR)
+    return img
+
+
+def needs_dpi_fix(path):
+    """
+    True for a single-image file whose stored DPI is not 300 (what Fix DPI
+    converts). PDFs and multi-page TIFFs are never flagged: PDF pages are
+    rendered at 300 DPI anyway and a TIFF can't be fixed page by page.
+    """
+    if _is_pdf(path):
+        return False
+    with Image.open(path) as img:
+        if getattr(img, 'n_frames', 1) > 1:
+            return False
+        d = img.info.get('dpi', (72, 72))
+    if isinstance(d, tuple):
+        d = d[0]
+    return abs(d - 300) > dpi_tolerance
+
+
+def iter_sheets(path):
+    """Yields (SheetPage, RGB image) for every page of `path`, decoding one page at a time."""
+    for sheet in list_pages(path):
+        yield sheet, open_sheet(path, sheet.page)
+
+
+def sheet_label(path, page=None):
+    """Display name of a sheet, e.g. "album.tif [p3]"."""
+    name = os.path.basename(path)
+    return name if page is None else f"{name} [p{page + 1}]"
+
+
+def sheet_base_name(path, page=None):
+    """Output file stem of a sheet; pages of one file get a zero-padded page number."""
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    return base_name if page is None else f"{base_name}_{page + 1:03d}"
+
+
+def source_dpi(path, page=None):
+    """Horizontal DPI stored in the file, None if missing. PDF pages are rendered at pdf_dpi."""
+    if _is_pdf(path):
+        return pdf_dpi
+    with Image.open(path) as img:
+        if page:
+            img.seek(page)
+        current_dpi = img.info.get('dpi')
+    if isinstance(current_dpi, tuple):
+        current_dpi = current_dpi[0]
+    return float(current_dpi) if current_dpi else None
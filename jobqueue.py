@@ -0,0 +1,365 @@
+"""
+Local multi-album job queue.
+
+Albums from any window are queued as jobs (split, crop & mark, one-pass,
+rotate, fix DPI) with a priority. A scheduler thread feeds their sheets to
+the shared worker pool one at a time, so:
+
+- a higher priority job takes the next free worker (preemption at sheet
+  boundaries, nothing running is interrupted),
+- jobs of the same priority share the workers fairly: the next sheet goes
+  to the job that has received the least worker time, and a newly started
+  job joins at the current level instead of catching up from zero.
+
+The queue is saved in gtcrop_jobs.json, so unfinished jobs resume after a
+restart (sheets that were in flight are simply run again). Tools that
+change their input files in place (rotate) can't run a sheet twice: their
+results are saved as each sheet finishes, and an interrupted job comes back
+"paused" until the user resumes it.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+
+from batch import get_executor, default_workers
+from processor import process_sheet, crop_and_mark_sheet, rotate_image_file, convert_to_300dpi
+from pipeline import run_pipeline
+
+jobs_file = "gtcrop_jobs.json"
+
+priorities = {0: "Normal", 1: "Rush"}
+
+
+def _page_kwargs(page):
+    return {} if page is None else {"page": page}
+
+
+def _run_split(job, item):
+    path, page = item
+    kwargs = _page_kwargs(page)
+    if job.options.get("rotate"):
+        kwargs["rotate"] = True
+    return process_sheet(path, job.output_folder, **kwargs)
+
+
+def _run_crop_mark(job, item):
+    path, page = item
+    return crop_and_mark_sheet(path, job.output_folder, **_page_kwargs(page))
+
+
+def _run_pipeline(job, item):
+    path, page = item
+    return run_pipeline(path, job.output_folder, **_page_kwargs(page))
+
+
+def _run_rotate(job, item):
+    path, method = item
+    return rotate_image_file(path, method)
+
+
+def _run_fix_dpi(job, item):
+    return convert_to_300dpi(item[0], job.output_folder)
+
+
+# tool -> (label, function(job, item) -> (success, msg)). Items are
+# [path, page] for the sheet tools, [path, transpose method] for rotate and
+# [path] for fix DPI.
+tools = {
+    "split": ("Process", _run_split),
+    "crop_mark": ("Crop & Mark", _run_crop_mark),
+    "pipeline": ("One pass", _run_pipeline),
+    "rotate": ("Rotate Pages", _run_rotate),
+    "fix_dpi": ("Fix DPI", _run_fix_dpi),
+}
+
+# Tools that rewrite their input files, so running an item twice isn't harmless
+in_place_tools = {"rotate"}
+
+
+class AlbumJob:
+    """One queued album. `results[i]` is None until item i has run."""
+
+    def __init__(self, name, tool, items, output_folder, priority=0, options=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:8]
+        self.name = name
+        self.tool = tool
+        self.items = [list(item) for item in items]
+        self.output_folder = output_folder
+        self.priority = priority
+        self.options = options or {}
+        self.state = "queued"  # queued, running, paused, done, cancelled
+        self.results = [None] * len(self.items)
+        self.created = time.time()
+        self.finished = None
+        self.service = 0.0       # worker seconds received (fair-share clock)
+        self.sheet_seconds = None  # running average per sheet
+        self.inflight = 0
+        self.pending = deque(range(len(self.items)))
+
+    @property
+    def done_count(self):
+        return sum(1 for r in self.results if r is not None)
+
+    @property
+    def failed_count(self):
+        return sum(1 for r in self.results if r is not None and not r[0])
+
+    def runnable(self):
+        return self.state in ("queued", "running") and bool(self.pending)
+
+    def to_json(self):
+        return {
+            "id": self.id, "name": self.name, "tool": self.tool, "items": self.items,
+            "output_folder": self.output_folder, "priority": self.priority,
+            "options": self.options, "state": self.state, "results": self.results,
+            "created": self.created, "finished": self.finished,
+            "service": self.service, "sheet_seconds": self.sheet_seconds,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        job = cls(data["name"], data["tool"], data["items"], data["output_folder"],
+                  data.get("priority", 0), data.get("options"), data["id"])
+        job.state = data.get("state", "queued")
+        job.results = data.get("results") or job.results
+        job.created = data.get("created", job.created)
+        job.finished = data.get("finished")
+        job.service = data.get("service", 0.0)
+        job.sheet_seconds = data.get("sheet_seconds")
+        job.pending = deque(i for i, r in enumerate(job.results) if r is None)
+        started = job.state == "running" or (job.state == "queued" and job.done_count)
+        if started and job.tool in in_place_tools and job.pending:
+            job.state = "paused"  # interrupted mid-album, the user decides (see JobQueue.resume)
+        elif job.state == "running":
+            job.state = "queued"
+        return job
+
+
+class JobQueue:
+    """
+    The queue plus its scheduler thread. on_change(job) is called from
+    worker threads whenever a job makes progress or changes state.
+    """
+
+    def __init__(self, state_file=jobs_file, workers=None, on_change=None):
+        self.state_file = state_file
+        self.workers = workers or default_workers
+        self.on_change = on_change
+        self.jobs = []
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()  # one writer at a time, newest snapshot last
+        self._inflight = 0
+        self._last_save = 0.0
+        self._stopped = False
+        self._load()
+        threading.Thread(target=self._schedule, daemon=True, name="gtcrop-scheduler").start()
+
+    # --- Queue management ---
+
+    def add(self, name, tool, items, output_folder, priority=0, options=None):
+        if tool not in tools:
+            raise ValueError(f"Unknown tool: {tool}")
+        job = AlbumJob(name, tool, items, output_folder, priority, options)
+        with self._cond:
+            self._join_fair_share(job)
+            self.jobs.append(job)
+            self._cond.notify_all()
+        self.save()
+        self._changed(job)
+        return job
+
+    def set_priority(self, job_id, priority):
+        with self._cond:
+            job = self._find(job_id)
+            if job is None:
+                return
+            job.priority = priority
+            self._join_fair_share(job)
+            self._cond.notify_all()
+        self.save()
+        self._changed(job)
+
+    def cancel(self, job_id):
+        """Stops dispatching the job's sheets; sheets already running finish."""
+        with self._cond:
+            job = self._find(job_id)
+            if job is None or job.state in ("done", "cancelled"):
+                return
+            job.state = "cancelled"
+            job.pending.clear()
+            job.finished = time.time()
+        self.save()
+        self._changed(job)
+
+    def resume(self, job_id):
+        """Lets a paused job run again."""
+        with self._cond:
+            job = self._find(job_id)
+            if job is None or job.state != "paused":
+                return
+            job.state = "queued"
+            self._join_fair_share(job)
+            self._cond.notify_all()
+        self.save()
+        self._changed(job)
+
+    def paused(self):
+        with self._cond:
+            return [j for j in self.jobs if j.state == "paused"]
+
+    def stop(self):
+        """
+        Stops dispatching (for exit) and saves the queue. Sheets already
+        running finish; their results may not make it to the file.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self.save()
+
+    def clear_finished(self):
+        with self._cond:
+            self.jobs = [j for j in self.jobs if j.state not in ("done", "cancelled")]
+        self.save()
+        self._changed(None)
+
+    def snapshot(self):
+        """[(job, eta_seconds or None)] in display order (priority, then age)."""
+        with self._cond:
+            jobs = sorted(self.jobs, key=lambda j: (-j.priority, j.created))
+            etas = self._etas(jobs)
+            return [(job, etas.get(job.id)) for job in jobs]
+
+    def _find(self, job_id):
+        return next((j for j in self.jobs if j.id == job_id), None)
+
+    def _join_fair_share(self, job):
+        # Start at the service level of the jobs it now competes with,
+        # otherwise it would take every worker until it caught up
+        peers = [j.service for j in self.jobs if j is not job and j.runnable() and j.priority == job.priority]
+        job.service = max(job.service, min(peers)) if peers else job.service
+
+    # --- Scheduling ---
+
+    def _pick(self):
+        runnable = [j for j in self.jobs if j.runnable()]
+        if not runnable:
+            return None
+        top = max(j.priority for j in runnable)
+        # Sheets in flight count as already served, or one job would get every free worker
+        return min((j for j in runnable if j.priority == top),
+                   key=lambda j: (j.service + j.inflight * (j.sheet_seconds or 1.0), j.created))
+
+    def _schedule(self):
+        executor = get_executor(self.workers)
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    if self._stopped:
+                        return
+                    if self._inflight < self.workers:
+                        job = self._pick()
+                    if job is None:
+                        self._cond.wait(timeout=1.0)
+                index = job.pending.popleft()
+                job.state = "running"
+                job.inflight += 1
+                self._inflight += 1
+            executor.submit(self._run_sheet, job, index)
+
+    def _run_sheet(self, job, index):
+        start = time.perf_counter()
+        try:
+            success, msg = tools[job.tool][1](job, job.items[index])
+        except Exception as e:
+            success, msg = False, f"Error: {e}"
+        seconds = time.perf_counter() - start
+
+        with self._cond:
+            job.results[index] = [success, msg]
+            job.inflight -= 1
+            self._inflight -= 1
+            job.service += seconds
+            job.sheet_seconds = seconds if job.sheet_seconds is None else 0.8 * job.sheet_seconds + 0.2 * seconds
+            finished = not job.pending and job.inflight == 0 and job.state == "running"
+            if finished:
+                job.state = "done"
+                job.finished = time.time()
+            self._cond.notify_all()
+
+        # An in-place result is saved right away: run again, it would turn the page twice
+        if finished or job.tool in in_place_tools or time.time() - self._last_save > 2.0:
+            self.save()
+        self._changed(job)
+
+    def _etas(self, jobs):
+        """
+        Seconds until each unfinished job is done. Higher priorities run
+        first; jobs of equal priority share the workers, so job i is done
+        once every peer has received min(its own work, job i's work).
+        """
+        known = [j.sheet_seconds for j in jobs if j.sheet_seconds]
+        fallback = sum(known) / len(known) if known else None
+        work = {}
+        for j in jobs:
+            if j.state in ("queued", "running"):
+                per_sheet = j.sheet_seconds or fallback
+                if per_sheet is None:
+                    continue
+                work[j.id] = (len(j.pending) + j.inflight / 2) * per_sheet
+        priority = {j.id: j.priority for j in jobs}
+        etas = {}
+        for j in jobs:
+            if j.id not in work:
+                continue
+            ahead = sum(w for k, w in work.items() if priority[k] > j.priority)
+            shared = sum(min(w, work[j.id]) for k, w in work.items() if priority[k] == j.priority)
+            etas[j.id] = (ahead + shared) / self.workers
+        return etas
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.jobs = [AlbumJob.from_json(d) for d in data.get("jobs", [])]
+        except (OSError, ValueError, KeyError):
+            self.jobs = []
+
+    def save(self):
+        # Called from the GUI and from worker threads; taking the snapshot
+        # inside the save lock means an older one never replaces a newer one
+        with self._save_lock:
+            with self._cond:
+                data = json.dumps({"jobs": [j.to_json() for j in self.jobs]})
+                self._last_save = time.time()
+            tmp = f"{self.state_file}.{uuid.uuid4().hex[:8]}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp, self.state_file)
+            except OSError:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def _changed(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "ETA —"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"ETA {seconds}s"
+    if seconds < 3600:
+        return f"ETA {seconds // 60}m {seconds % 60:02d}s"
+    return f"ETA {seconds // 3600}h {seconds % 3600 // 60:02d}m"
@@ -1,11 +1,45 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import os
+import time
 import threading
-import json
-from processor import process_sheet, crop_and_mark_sheet, is_valid_sheet, dpi, rotate_images_in_folder, convert_to_300dpi
+from functools import partial
+from processor import process_sheet, crop_and_mark_sheet, is_valid_sheet, dpi, rotate_images_in_folder, convert_to_300dpi, plan_rotation
+from scanner import list_images, image_extensions
+from inputs import list_pages, sheet_label, sheet_extensions, sheet_filetypes, needs_dpi_fix
+from batch import run_batch, default_workers
+from bufferpool import pool_stats
+from colormgmt import color_stats
+from pipeline import run_pipeline, PipelineReport
+from config import load_config, update_config
+from profiler import BatchProfiler
+from autotune import WorkerTuner
+from uibus import UIBus
+from outputs import open_sink, sink_kinds, pending_writes
+from valcache import ValidationCache
+from preview import contact_sheets, save_contact_sheets
+import dupes
+from verify import Verifier
+from resample import tiers as resample_tiers, resample_tools, resample_tier, set_resample_tier, compare_tiers, format_comparison
+from jobqueue import JobQueue, tools as job_tools, priorities, format_eta
+import spool
 from tkinterdnd2 import TkinterDnD, DND_FILES
 
+def album_name(items):
+    """Queue label of an album: the folder its first sheet is in."""
+    first = items[0][0] if items else ""
+    return os.path.basename(os.path.dirname(os.path.abspath(first))) or "Album"
+
+def save_profile(profiler, output_folder):
+    # Runs on the GUI thread: before 3.12 cProfile can only be stopped by the thread that started it
+    try:
+        pstats_path, collapsed_path = profiler.save(output_folder)
+    except OSError as e:
+        print(f"Could not save profile: {e}")
+        return
+    print(profiler.summary())
+    print(f"Profile saved: {pstats_path or '(no cProfile data)'}, {collapsed_path}")
+
 class CTkDnD(ctk.CTk, TkinterDnD.DnDWrapper):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -41,51 +75,73 @@ class GTCropApp:
         self.apply_theme()
 
         # Initialize data
-        self.input_files = []  # List of dicts: {'path': str, 'valid': bool, 'widget': ctk.CTkFrame}
+        self.input_files = []  # List of dicts: {'path': str, 'page': int|None, 'valid': bool, 'widget': ctk.CTkFrame}
         self.output_folder = ""
+        self.failed_count = 0
 
         # Create GUI
         self.create_widgets()
+
+        # Progress, status and results from worker threads, applied in batches
+        self.bus = UIBus(self.root)
+        self.bus.subscribe("main.progress", self.update_progress)
+        self.bus.subscribe("main.status", self.show_status)
+        self.bus.subscribe("main.results", self.show_results, batch=True)
+
+        # Albums queued from any window; unfinished jobs from last session resume,
+        # except in-place ones (rotate), which wait for the user to say so
+        self.jobs = JobQueue(on_change=lambda job: self.bus.publish("queue.changed", job))
+        self.job_queue_window = None
+        self.root.after(0, self.ask_resume_jobs)
+
+        # Write-behind pages still on their way to the output folder are finished before exit
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Enable Drag & Drop
         self.setup_dnd()
 
+    def ask_resume_jobs(self):
+        paused = self.jobs.paused()
+        if not paused:
+            return
+        names = "\n".join(f"• {job.name} ({job.done_count}/{len(job.items)} done)" for job in paused)
+        if messagebox.askyesno("Resume Jobs",
+                               f"These jobs change images in place and were interrupted:\n{names}\n\n"
+                               "Resume them? Pages already done are skipped."):
+            for job in paused:
+                self.jobs.resume(job.id)
+        else:
+            for job in paused:
+                self.jobs.cancel(job.id)
+
+    def on_close(self):
+        # No new sheets start, and the queue is saved as it stands
+        self.jobs.stop()
+        pages, size = pending_writes()
+        if not pages:
+            self.root.destroy()
+            return
+        self.status_label.configure(text=f"Finishing {pages} pages ({size / 2 ** 20:.0f} MB) before closing...",
+                                    text_color=self.colors["primary"])
+        self.root.after(500, self.on_close)
+
     def setup_dnd(self):
         self.root.drop_target_register(DND_FILES)
         self.root.dnd_bind('<<Drop>>', self.on_drop)
 
     def on_drop(self, event):
         files = self.root.tk.splitlist(event.data)
-        image_extensions = {'.jpg', '.jpeg', '.png'}
-        
-        for f in files:
-            if os.path.isdir(f):
-                # Add folder content
-                for root, _, filenames in os.walk(f):
-                    for filename in filenames:
-                        if any(filename.lower().endswith(ext) for ext in image_extensions):
-                            self.add_file(os.path.join(root, filename))
-            elif os.path.isfile(f):
-                if any(f.lower().endswith(ext) for ext in image_extensions):
-                    self.add_file(f)
+
+        # Folders are scanned recursively, loose files are kept if they are images
+        for entry in list_images(files, extensions=sheet_extensions):
+            self.add_file(entry.path)
 
 
     def load_theme_preference(self):
-        try:
-            if os.path.exists("gtcrop_config.json"):
-                with open("gtcrop_config.json", "r") as f:
-                    config = json.load(f)
-                    return config.get("dark_mode", True)
-        except:
-            pass
-        return True # Default to dark
+        return load_config().get("dark_mode", True) # Default to dark
 
     def save_theme_preference(self):
-        try:
-            with open("gtcrop_config.json", "w") as f:
-                json.dump({"dark_mode": self.dark_mode}, f)
-        except:
-            pass
+        update_config(dark_mode=self.dark_mode)
 
     def apply_theme(self):
         ctk.set_appearance_mode("Dark" if self.dark_mode else "Light")
@@ -238,7 +294,60 @@ class GTCropApp:
 
         ctk.CTkButton(tools_frame, text="🔍 Album Validator", command=self.open_album_validator).pack(padx=15, pady=(0, 10), fill="x")
         ctk.CTkButton(tools_frame, text="🖼️ Crop & Mark ", command=self.start_crop_mark).pack(padx=15, pady=(0, 10), fill="x")
-        ctk.CTkButton(tools_frame, text="🔄 Rotate Pages", command=self.rotate_folder_images).pack(padx=15, pady=(0, 15), fill="x")
+        ctk.CTkButton(tools_frame, text="🔄 Rotate Pages", command=self.rotate_folder_images).pack(padx=15, pady=(0, 10), fill="x")
+        ctk.CTkButton(tools_frame, text="📋 Job Queue", command=self.open_job_queue).pack(padx=15, pady=(0, 10), fill="x")
+        ctk.CTkButton(tools_frame, text="🖧 Shared Queue", command=self.open_shared_queue).pack(padx=15, pady=(0, 10), fill="x")
+        ctk.CTkButton(tools_frame, text="🎚️ Resampling", command=self.open_resampling).pack(padx=15, pady=(0, 15), fill="x")
+
+        # Fix DPI + Process + Rotate Pages in one decode/encode per page
+        self.pipeline_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            right_frame,
+            text="⚡ One pass: Fix DPI → Split → Rotate",
+            variable=self.pipeline_var
+        ).pack(anchor="w", pady=(10, 0))
+
+        # Split batches write pages already turned (the one-pass mode always does)
+        self.rotate_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            right_frame,
+            text="🔄 Rotate pages as they are written",
+            variable=self.rotate_var
+        ).pack(anchor="w", pady=(5, 0))
+
+        # Re-open every written page (and check the source's end marker) while the batch runs
+        self.verify_var = ctk.BooleanVar(value=bool(load_config().get("verify_outputs", False)))
+        ctk.CTkCheckBox(
+            right_frame,
+            text="🛡️ Verify written pages",
+            variable=self.verify_var,
+            command=lambda: update_config(verify_outputs=self.verify_var.get())
+        ).pack(anchor="w", pady=(5, 0))
+
+        # Find the best worker count for this output folder while the batch runs
+        self.autotune_var = ctk.BooleanVar(value=bool(load_config().get("autotune_workers", True)))
+        ctk.CTkCheckBox(
+            right_frame,
+            text="🎛️ Auto-tune workers",
+            variable=self.autotune_var,
+            command=lambda: update_config(autotune_workers=self.autotune_var.get())
+        ).pack(anchor="w", pady=(5, 0))
+
+        # Where the pages go: separate JPEGs (default) or one PDF/ZIP per batch
+        output_row = ctk.CTkFrame(right_frame, fg_color="transparent")
+        output_row.pack(anchor="w", pady=(5, 0))
+        ctk.CTkLabel(output_row, text="Save pages as:").pack(side="left", padx=(0, 8))
+        self.sink_labels = {label: kind for kind, (label, _) in sink_kinds.items()}
+        self.sink_var = ctk.StringVar(value=sink_kinds["files"][0])
+        ctk.CTkOptionMenu(output_row, values=list(self.sink_labels), variable=self.sink_var, width=160).pack(side="left")
+
+        # One-shot: profile the next batch (this window or Crop & Mark)
+        self.profile_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            right_frame,
+            text="🔬 Profile next batch",
+            variable=self.profile_var
+        ).pack(anchor="w", pady=(5, 0))
 
         # -- Process Button --
         self.btn_process = ctk.CTkButton(
@@ -251,6 +360,16 @@ class GTCropApp:
         )
         self.btn_process.pack(fill="x", pady=(10, 0))
 
+        # -- Queue instead of running now (never blocked by a running batch) --
+        queue_row = ctk.CTkFrame(right_frame, fg_color="transparent")
+        queue_row.pack(fill="x", pady=(8, 0))
+        ctk.CTkButton(queue_row, text="➕ Add to Queue", command=self.queue_album).pack(side="left", fill="x", expand=True)
+        self.rush_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(queue_row, text="🚨 Rush", variable=self.rush_var, width=80).pack(side="right", padx=(10, 0))
+
+        # -- Proof the planned splits and papers before rendering anything --
+        ctk.CTkButton(right_frame, text="🗺️ Preview Layout", command=self.preview_layout).pack(fill="x", pady=(8, 0))
+
     def create_footer(self, parent):
         footer_frame = ctk.CTkFrame(parent, fg_color="transparent")
         footer_frame.pack(fill="x", pady=(10, 0))
@@ -279,7 +398,7 @@ class GTCropApp:
         
         # Re-add files, which will create new widgets with updated theme colors
         for f_data in current_files_data:
-            self.add_file(f_data['path'])
+            self.add_file(f_data['path'], f_data['page'], f_data['size'])
             
         self.refresh_static_widgets()
 
@@ -291,7 +410,7 @@ class GTCropApp:
         self.btn_process.configure(fg_color=self.colors["success"])
         self.theme_btn.configure(text_color=self.text_color)
 
-    def add_file_widget(self, file_path, display_text, is_valid):
+    def add_file_widget(self, file_path, display_text, is_valid, page=None):
         row = ctk.CTkFrame(self.file_scroll_frame, fg_color="transparent")
         row.pack(fill="x", pady=2)
 
@@ -305,7 +424,7 @@ class GTCropApp:
         text_frame = ctk.CTkFrame(row, fg_color="transparent")
         text_frame.pack(side="left", fill="x", expand=True, padx=5)
         
-        name = os.path.basename(file_path)
+        name = sheet_label(file_path, page)
         ctk.CTkLabel(text_frame, text=name, anchor="w", font=("Segoe UI", 13), text_color=self.text_color).pack(fill="x")
         ctk.CTkLabel(text_frame, text=display_text.split(":", 1)[1].strip(), anchor="w", font=("Segoe UI", 11), text_color=color).pack(fill="x")
 
@@ -324,28 +443,44 @@ class GTCropApp:
 
         return row
 
-    def validate_file(self, file_path):
+    def validate_file(self, file_path, page=None, size=None):
+        label = sheet_label(file_path, page)
         try:
-            from PIL import Image
-            img = Image.open(file_path)
-            w_in = img.width / dpi
-            h_in = img.height / dpi
+            if size is None:
+                size = next(s.size for s in list_pages(file_path) if s.page == page)
+            w_in = size[0] / dpi
+            h_in = size[1] / dpi
             is_valid = is_valid_sheet(w_in, h_in)
             status = "OK" if is_valid else "NOT MATCHED"
-            return is_valid, f"{os.path.basename(file_path)}: {w_in:.2f} × {h_in:.2f}\" → {status}"
+            return is_valid, f"{label}: {w_in:.2f} × {h_in:.2f}\" → {status}"
         except Exception as e:
-            return False, f"{os.path.basename(file_path)}: Error reading file"
+            return False, f"{label}: Error reading file"
+
+    def add_file(self, file_path, page=None, size=None):
+        # Multi-page TIFF/PDF files are added as one sheet per page
+        if page is None and size is None:
+            try:
+                sheets = list_pages(file_path)
+            except Exception:
+                sheets = []
+            if len(sheets) > 1 or (sheets and sheets[0].page is not None):
+                for sheet in sheets:
+                    self.add_file(file_path, sheet.page, sheet.size)
+                return
+            if sheets:
+                size = sheets[0].size
 
-    def add_file(self, file_path):
         # Check if already added
-        if any(f['path'] == file_path for f in self.input_files):
+        if any(f['path'] == file_path and f['page'] == page for f in self.input_files):
             return
 
-        is_valid, display_text = self.validate_file(file_path)
-        widget = self.add_file_widget(file_path, display_text, is_valid)
+        is_valid, display_text = self.validate_file(file_path, page, size)
+        widget = self.add_file_widget(file_path, display_text, is_valid, page)
         
         self.input_files.append({
             'path': file_path,
+            'page': page,
+            'size': size,
             'valid': is_valid,
             'widget': widget
         })
@@ -353,7 +488,7 @@ class GTCropApp:
 
     def remove_file(self, file_path, widget):
         widget.destroy()
-        self.input_files = [f for f in self.input_files if f['path'] != file_path]
+        self.input_files = [f for f in self.input_files if f['widget'] is not widget]
         self.update_status()
 
     def clear_all_files(self):
@@ -373,7 +508,7 @@ class GTCropApp:
             messagebox.showinfo("Info", "No invalid files to remove.")
 
     def select_single_file(self):
-        file = filedialog.askopenfilename(title="Select One Sheet Image", filetypes=[("Image files", "*.jpg *.jpeg *.png")])
+        file = filedialog.askopenfilename(title="Select One Sheet Image", filetypes=sheet_filetypes)
         if file:
             self.add_file(file)
 
@@ -381,12 +516,10 @@ class GTCropApp:
         folder = filedialog.askdirectory(title="Select Folder with 100+ Sheets")
         if not folder:
             return
-        image_extensions = {'.jpg', '.jpeg', '.png'}
         added_count = 0
-        for filename in os.listdir(folder):
-            if any(filename.lower().endswith(ext) for ext in image_extensions):
-                self.add_file(os.path.join(folder, filename))
-                added_count += 1
+        for entry in list_images(folder, extensions=sheet_extensions, recursive=False):
+            self.add_file(entry.path)
+            added_count += 1
         
         if added_count == 0:
             messagebox.showinfo("Info", "No valid image files found in this folder.")
@@ -428,46 +561,176 @@ class GTCropApp:
             messagebox.showwarning("No Valid Files", "No valid sheets to process!")
             return
 
+        # A PDF/ZIP is created now, so one that can't be written stops here
+        sink_kind = self.sink_labels[self.sink_var.get()]
+        try:
+            sink = open_sink(sink_kind, self.output_folder) if sink_kind != "files" else None
+        except OSError as e:
+            messagebox.showerror("Output", f"Cannot create the output file:\n{e}")
+            return
+
         self.progress.pack(side="right", padx=10)
         self.btn_process.configure(state="disabled", text="Processing...")
         self.status_label.configure(text="Processing...", text_color=self.colors["primary"])
         
-        # Extract just paths for the processor
-        paths = [f['path'] for f in valid_files]
-        threading.Thread(target=self.process_all, args=(paths,), daemon=True).start()
+        # Extract just (path, page) for the processor
+        paths = [(f['path'], f['page']) for f in valid_files]
+        self.failed_count = 0
+        profiler = self.take_profiler()
+        threading.Thread(target=self.process_all, args=(paths, self.pipeline_var.get(), profiler, self.rotate_var.get(), sink, self.verify_var.get(), self.autotune_var.get()), daemon=True).start()
 
-    def process_all(self, file_paths):
-        success_count = 0
-        for i, path in enumerate(file_paths):
-            try:
-                success, msg = process_sheet(path, self.output_folder)
-                if success: success_count += 1
-                print(f"{os.path.basename(path)}: {msg}")
-            except Exception as e:
-                print(f"Error: {e}")
-            
-            self.root.after(0, self.update_progress, (i + 1) / len(file_paths))
+    def queue_album(self):
+        if not self.output_folder:
+            messagebox.showwarning("No Output", "Please select an output folder.")
+            return
+        valid_files = [f for f in self.input_files if f['valid']]
+        if not valid_files:
+            messagebox.showwarning("No Valid Files", "No valid sheets to queue!")
+            return
+        items = [(f['path'], f['page']) for f in valid_files]
+        tool = "pipeline" if self.pipeline_var.get() else "split"
+        options = {"rotate": True} if tool == "split" and self.rotate_var.get() else {}
+        job = self.jobs.add(album_name(items), tool, items, self.output_folder,
+                            priority=int(self.rush_var.get()), options=options)
+        self.status_label.configure(text=f"Queued {job.name} ({len(items)} sheets)", text_color=self.colors["primary"])
+
+    def preview_layout(self):
+        if not self.input_files:
+            messagebox.showwarning("No Files", "Please add input images.")
+            return
+        sheets = [(f['path'], f['page']) for f in self.input_files]
+        LayoutPreviewWindow(self.root, self, sheets, "split", album_name(sheets), self.dark_mode)
 
-        self.root.after(0, self.on_processing_complete, success_count, len(file_paths))
+    def open_job_queue(self):
+        if self.job_queue_window and self.job_queue_window.window.winfo_exists():
+            self.job_queue_window.window.focus()
+            return
+        self.job_queue_window = JobQueueWindow(self.root, self, self.dark_mode)
+
+    def take_profiler(self):
+        """
+        A started BatchProfiler when "Profile next batch" is ticked (the tick
+        is cleared), else None. Call from the GUI thread, so it is profiled too.
+        """
+        if not self.profile_var.get():
+            return None
+        self.profile_var.set(False)
+        return BatchProfiler().start()
+
+    def process_all(self, file_paths, one_pass=False, profiler=None, rotate=False, sink=None, verify=False,
+                    autotune=False):
+        # Whatever happens, the button comes back
+        success_count, error = 0, None
+        try:
+            success_count = self.run_all(file_paths, one_pass, profiler, rotate, sink, verify, autotune)
+            if getattr(sink, "error", None) is not None:
+                error = f"{sink.path} is incomplete: {sink.error}"
+        except Exception as e:
+            print(f"❌ Batch stopped: {e}")
+            error = str(e)
+        self.bus.call(self.on_processing_complete, success_count, len(file_paths), error)
+
+    def run_all(self, file_paths, one_pass, profiler, rotate, sink, verify, autotune):
+        def on_result(done, total, path, success, msg):
+            self.bus.publish("main.progress", done / total)
+            self.bus.publish("main.results", (done, total, path, success, msg))
+
+        color_stats.reset()
+        report = PipelineReport() if one_pass else None
+        if one_pass:
+            func = partial(run_pipeline, report=report)
+        else:
+            func = partial(process_sheet, rotate=rotate) if rotate else process_sheet
+        # Pages inside a PDF/ZIP aren't files of their own and write-behind pages
+        # land after their sheet, verification covers the plain JPEG output
+        verifier = Verifier(tool=None if one_pass else "split") if verify and not sink else None
+        tuner = WorkerTuner(self.output_folder) if autotune else None
+        try:
+            results = run_batch(func, file_paths, self.output_folder, on_result=on_result, profiler=profiler,
+                                sink=sink, verifier=verifier, tuner=tuner)
+        finally:
+            if sink:
+                self.drain(sink)
+                sink.close()
+            if verifier:
+                verifier.shutdown()
+        for item, success, msg in results:
+            if "⚠️ Verify:" in msg:
+                print(f"{os.path.basename(item[0])}: {msg}")
+        if verifier:
+            print(verifier.summary())
+        if tuner:
+            print(tuner.summary())
+            tuner.save()
+        success_count = sum(1 for _, success, _ in results if success)
+        if sink:
+            print(f"Saved {sink.pages_written} pages to {sink.path}")
+            for filename, _, error in getattr(sink, "failed", ()):
+                print(f"❌ Could not write {filename}: {error}")
+        print(f"Buffer pool: {pool_stats()}")
+        print(color_stats.summary())
+        if report:
+            print(report.summary())
+
+        if profiler:
+            self.bus.call(save_profile, profiler, self.output_folder)
+        return success_count
+
+    def drain(self, sink):
+        # Rendering is done; show the write-behind backlog until it reaches the output folder
+        while hasattr(sink, "backlog"):
+            pages, size = sink.backlog()
+            if not pages:
+                break
+            self.bus.publish("main.status", (f"Writing {pages} pages to the output folder ({size / 2 ** 20:.0f} MB)...", "primary"))
+            time.sleep(0.5)
 
     def update_progress(self, value):
         self.progress.set(value)
 
-    def on_processing_complete(self, success, total):
+    def show_status(self, status):
+        text, color = status
+        self.status_label.configure(text=text, text_color=self.colors[color])
+
+    def show_results(self, results):
+        # Everything that finished since the last UI tick, in one update
+        print("\n".join(f"{os.path.basename(path)}: {msg}" for _, _, path, _, msg in results))
+        done = max(r[0] for r in results)
+        total = results[0][1]
+        self.failed_count += sum(1 for r in results if not r[3])
+        text = f"Processing... {done}/{total}"
+        if self.failed_count:
+            text += f" ({self.failed_count} failed)"
+        pages, size = pending_writes()
+        if pages:
+            text += f" — {pages} pages ({size / 2 ** 20:.0f} MB) waiting to be written"
+        self.status_label.configure(text=text, text_color=self.colors["primary"])
+
+    def on_processing_complete(self, success, total, error=None):
         self.progress.pack_forget()
         self.btn_process.configure(state="normal", text="🚀 Process All Valid")
+        if error:
+            self.status_label.configure(text=f"Stopped: {success}/{total} processed.", text_color=self.colors["error"])
+            messagebox.showerror("Processing stopped", f"Processed {success} of {total} sheets.\n\n{error}")
+            return
         self.status_label.configure(text=f"Done! {success}/{total} processed.", text_color=self.colors["success"])
         messagebox.showinfo("Complete", f"Processed {success} of {total} sheets.")
 
     # --- Sub-Windows ---
     def start_crop_mark(self):
-        CropMarkWindow(self.root, self.dark_mode)
+        CropMarkWindow(self.root, self.dark_mode, app=self)
 
     def open_album_validator(self):
         validator_window = ctk.CTkToplevel(self.root)
         validator_window.title("GT Crop - Album Validator")
         validator_window.geometry("720x520")
-        AlbumValidator(validator_window, self.dark_mode)
+        AlbumValidator(validator_window, self.dark_mode, app=self)
+
+    def open_shared_queue(self):
+        SharedQueueWindow(self.root, self, self.dark_mode)
+
+    def open_resampling(self):
+        ResamplingWindow(self.root, self, self.dark_mode)
 
     def rotate_folder_images(self):
         folder = filedialog.askdirectory(title="Select Folder to Rotate Images")
@@ -477,17 +740,27 @@ class GTCropApp:
             return
 
         self.status_label.configure(text="Rotating...", text_color=self.colors["primary"])
+        self.progress.set(0)
+        self.progress.pack(side="right", padx=10)
         threading.Thread(target=self._do_rotate, args=(folder,), daemon=True).start()
 
     def _do_rotate(self, folder):
-        success, total, errors = rotate_images_in_folder(folder)
-        self.root.after(0, lambda: messagebox.showinfo("Done", f"Rotated {success}/{total} images."))
-        self.root.after(0, lambda: self.status_label.configure(text="Rotation complete", text_color=self.colors["success"]))
+        def on_result(done, total, path, success, msg):
+            self.bus.publish("main.progress", done / total)
+            self.bus.publish("main.status", (f"Rotating... {done}/{total}", "primary"))
+
+        success, total, errors = rotate_images_in_folder(folder, on_result=on_result)
+        for error in errors:
+            print(f"⚠️ {error}")
+        self.bus.publish("main.status", ("Rotation complete", "success"))
+        self.bus.call(self.progress.pack_forget)
+        self.bus.call(messagebox.showinfo, "Done", f"Rotated {success}/{total} images.")
 
 
 class CropMarkWindow:
-    def __init__(self, parent, dark_mode=False):
+    def __init__(self, parent, dark_mode=False, app=None):
         self.parent = parent
+        self.app = app
         self.dark_mode = dark_mode
 
         self.window = ctk.CTkToplevel(parent)
@@ -532,7 +805,10 @@ class CropMarkWindow:
 
         # Process
         self.btn_process = ctk.CTkButton(self.window, text="🚀 Process Selected Files", command=self.start_processing, fg_color="#4CAF50", height=40)
-        self.btn_process.pack(fill="x", padx=20, pady=20)
+        self.btn_process.pack(fill="x", padx=20, pady=(20, 5))
+        if app:
+            ctk.CTkButton(self.window, text="➕ Add to Queue", command=self.queue_album).pack(fill="x", padx=20, pady=(0, 5))
+            ctk.CTkButton(self.window, text="🗺️ Preview Layout", command=self.preview_layout).pack(fill="x", padx=20, pady=(0, 15))
         
         self.status = ctk.CTkLabel(self.window, text="Ready — Add files to begin", text_color="#4CAF50" if not dark_mode else "#66bb66")
         self.status.pack()
@@ -540,26 +816,27 @@ class CropMarkWindow:
         self.input_files = []
         self.output_folder = ""
 
+        # Shares the main window's UI bus (one per window when opened on its own)
+        self.bus = app.bus if app else UIBus(self.window)
+        self.topic = f"cropmark-{id(self)}"
+        self.bus.subscribe(f"{self.topic}.results", self.show_results, batch=True)
+        self.window.bind("<Destroy>", self.on_destroy, add="+")
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.bus.unsubscribe(f"{self.topic}.results")
+
     def on_drop(self, event):
         files = self.window.tk.splitlist(event.data)
-        image_extensions = {'.jpg', '.jpeg', '.png'}
         
         added_count = 0
-        for f in files:
-            if os.path.isdir(f):
-                for root, _, filenames in os.walk(f):
-                    for filename in filenames:
-                        if any(filename.lower().endswith(ext) for ext in image_extensions):
-                            self.add_file(os.path.join(root, filename))
-                            added_count += 1
-            elif os.path.isfile(f):
-                if any(f.lower().endswith(ext) for ext in image_extensions):
-                    self.add_file(f)
-                    added_count += 1
+        for entry in list_images(files, extensions=sheet_extensions):
+            self.add_file(entry.path)
+            added_count += 1
 
 
     def select_files(self):
-        files = filedialog.askopenfilenames(title="Select 12x24 or 10x24 Sheets", filetypes=[("Image files", "*.jpg *.jpeg *.png")])
+        files = filedialog.askopenfilenames(title="Select 12x24 or 10x24 Sheets", filetypes=sheet_filetypes)
         if files:
             for file_path in files:
                 self.add_file(file_path)
@@ -568,18 +845,16 @@ class CropMarkWindow:
         folder = filedialog.askdirectory(title="Select Folder with 100+ Sheets")
         if not folder:
             return
-        image_extensions = {'.jpg', '.jpeg', '.png'}
         added_count = 0
         error_count = 0
-        for filename in os.listdir(folder):
-            if any(filename.lower().endswith(ext) for ext in image_extensions):
-                file_path = os.path.join(folder, filename)
-                try:
-                    self.add_file(file_path)
-                    added_count += 1
-                except Exception as e:
-                    print(f"⚠️ Failed to load {filename}: {e}")
-                    error_count += 1
+        for entry in list_images(folder, extensions=sheet_extensions, recursive=False):
+            filename = os.path.basename(entry.path)
+            try:
+                self.add_file(entry.path)
+                added_count += 1
+            except Exception as e:
+                print(f"⚠️ Failed to load {filename}: {e}")
+                error_count += 1
         if added_count == 0:
             messagebox.showinfo("Info", "No valid image files found in this folder.")
         else:
@@ -588,12 +863,18 @@ class CropMarkWindow:
                 message += f" (with {error_count} errors)"
             messagebox.showinfo("Success", message)
 
-    def add_file(self, file_path):
+    def add_file(self, file_path, page=None, size=None):
         try:
-            from PIL import Image
-            img = Image.open(file_path)
-            w_in = img.width / dpi
-            h_in = img.height / dpi
+            if size is None:
+                # Multi-page TIFF/PDF files are added as one sheet per page
+                sheets = list_pages(file_path)
+                if len(sheets) > 1 or sheets[0].page is not None:
+                    for sheet in sheets:
+                        self.add_file(file_path, sheet.page, sheet.size)
+                    return
+                size = sheets[0].size
+            w_in = size[0] / dpi
+            h_in = size[1] / dpi
             
             # Logic check for 12x24 or 10x24
             is_valid_size = (
@@ -611,19 +892,19 @@ class CropMarkWindow:
             
             ctk.CTkLabel(row, text="✅" if is_valid_size else "❌", width=30).pack(side="left")
             
-            details = f"{os.path.basename(file_path)} ({w_in:.1f}x{h_in:.1f}\")"
+            details = f"{sheet_label(file_path, page)} ({w_in:.1f}x{h_in:.1f}\")"
             ctk.CTkLabel(row, text=details, text_color=self.text_color, anchor="w").pack(side="left", padx=10, fill="x", expand=True)
             ctk.CTkLabel(row, text=status_text, text_color=status_color, width=100).pack(side="left", padx=10)
             
             ctk.CTkButton(row, text="×", width=30, fg_color="transparent", text_color="red", hover_color="#ffebee", command=lambda: self.remove_file(file_path, row)).pack(side="right")
             
-            self.input_files.append({'path': file_path, 'widget': row, 'valid': is_valid_size})
+            self.input_files.append({'path': file_path, 'page': page, 'widget': row, 'valid': is_valid_size})
         except Exception as e:
             print(f"Error adding file: {e}")
 
     def remove_file(self, path, widget):
         widget.destroy()
-        self.input_files = [f for f in self.input_files if f['path'] != path]
+        self.input_files = [f for f in self.input_files if f['widget'] is not widget]
 
     def clear_all(self):
         for f in self.input_files: f['widget'].destroy()
@@ -649,22 +930,70 @@ class CropMarkWindow:
 
         self.btn_process.configure(state="disabled", text="Processing...")
         self.status.configure(text=f"Processing {len(valid_files)} files...", text_color="#2196F3")
-        threading.Thread(target=self.process_all, args=(valid_files,), daemon=True).start()
+        self.failed_count = 0
+        profiler = self.app.take_profiler() if self.app else None
+        autotune = self.app.autotune_var.get() if self.app else bool(load_config().get("autotune_workers", True))
+        verify = self.app.verify_var.get() if self.app else bool(load_config().get("verify_outputs", False))
+        threading.Thread(target=self.process_all, args=(valid_files, profiler, autotune, verify), daemon=True).start()
 
-    def process_all(self, valid_files):
-        success_count = 0
-        total_output = 0
-        for item in valid_files:
-            file_path = item['path']
-            try:
-                success, msg = crop_and_mark_sheet(file_path, self.output_folder)
-                if success:
-                    success_count += 1
-                    total_output += 2
-                print(f"{os.path.basename(file_path)}: {msg}")
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-        self.window.after(0, self.on_processing_complete, success_count, len(valid_files), total_output)
+    def queue_album(self):
+        if not self.output_folder:
+            messagebox.showwarning("No Output", "Please select an output folder.")
+            return
+        items = [(f['path'], f['page']) for f in self.input_files if f['valid']]
+        if not items:
+            messagebox.showinfo("Info", "No valid 12x24 or 10x24 sheets found.")
+            return
+        job = self.app.jobs.add(album_name(items), "crop_mark", items, self.output_folder)
+        self.status.configure(text=f"Queued {job.name} ({len(items)} sheets) — see Job Queue", text_color="#2196F3")
+
+    def preview_layout(self):
+        if not self.input_files:
+            messagebox.showwarning("No Files", "Please add input images.")
+            return
+        sheets = [(f['path'], f['page']) for f in self.input_files]
+        LayoutPreviewWindow(self.window, self.app, sheets, "crop_mark", album_name(sheets), self.dark_mode,
+                            output_folder=self.output_folder)
+
+    def process_all(self, valid_files, profiler=None, autotune=False, verify=False):
+        def on_result(done, total, path, success, msg):
+            self.bus.publish(f"{self.topic}.results", (done, total, path, success, msg))
+
+        paths = [(item['path'], item['page']) for item in valid_files]
+        color_stats.reset()
+        tuner = WorkerTuner(self.output_folder) if autotune else None
+        verifier = Verifier(tool="crop_mark") if verify else None
+        try:
+            results = run_batch(crop_and_mark_sheet, paths, self.output_folder, on_result=on_result, profiler=profiler,
+                                verifier=verifier, tuner=tuner)
+        finally:
+            if verifier:
+                verifier.shutdown()
+        for item, success, msg in results:
+            if "⚠️ Verify:" in msg:
+                print(f"{os.path.basename(item[0])}: {msg}")
+        if verifier:
+            print(verifier.summary())
+        if tuner:
+            print(tuner.summary())
+            tuner.save()
+        success_count = sum(1 for _, success, _ in results if success)
+        total_output = 2 * success_count
+        print(f"Buffer pool: {pool_stats()}")
+        print(color_stats.summary())
+        if profiler:
+            self.bus.call(save_profile, profiler, self.output_folder)
+        self.bus.call(self.on_processing_complete, success_count, len(valid_files), total_output)
+
+    def show_results(self, results):
+        print("\n".join(f"{os.path.basename(path)}: {msg}" for _, _, path, _, msg in results))
+        done = max(r[0] for r in results)
+        total = results[0][1]
+        self.failed_count += sum(1 for r in results if not r[3])
+        text = f"Processing {done}/{total} files..."
+        if self.failed_count:
+            text += f" ({self.failed_count} failed)"
+        self.status.configure(text=text, text_color="#2196F3")
 
     def on_processing_complete(self, success_count, total_valid, total_output):
         self.btn_process.configure(state="normal", text="🚀 Process Selected Files")
@@ -673,10 +1002,367 @@ class CropMarkWindow:
         messagebox.showinfo("GT Crop", f"Crop & Mark complete!\n{success_count} out of {total_valid} files processed.\n{total_output} files saved.")
 
 
+class LayoutPreviewWindow:
+    """Contact sheets of the planned splits and papers of an album (see preview.py)."""
+
+    def __init__(self, parent, app, sheets, tool, title, dark_mode=False, output_folder=None):
+        self.app = app
+        self.title = title
+        self.output_folder = output_folder or app.output_folder
+        self.pages = []
+        self.index = 0
+        self.summary = None  # set once the pages are built
+        self.window = ctk.CTkToplevel(parent)
+        self.window.title(f"GT Crop - Layout Preview: {title}")
+        self.window.geometry("1000x780")
+
+        # Theme colors
+        self.text_color = "white" if dark_mode else "black"
+        self.window.configure(fg_color="#2b2b2b" if dark_mode else "#f5f5f5")
+
+        controls = ctk.CTkFrame(self.window, fg_color="transparent")
+        controls.pack(fill="x", padx=20, pady=10)
+        self.btn_prev = ctk.CTkButton(controls, text="◀", width=40, command=lambda: self.show_page(self.index - 1))
+        self.btn_prev.pack(side="left", padx=5)
+        self.btn_next = ctk.CTkButton(controls, text="▶", width=40, command=lambda: self.show_page(self.index + 1))
+        self.btn_next.pack(side="left", padx=5)
+        self.status = ctk.CTkLabel(controls, text=f"Planning {len(sheets)} sheets...", text_color=self.text_color)
+        self.status.pack(side="left", padx=10)
+        ctk.CTkButton(controls, text="💾 Save Pages", command=self.save_pages, width=120).pack(side="right", padx=5)
+
+        self.image_label = ctk.CTkLabel(self.window, text="")
+        self.image_label.pack(fill="both", expand=True, padx=20, pady=(0, 15))
+
+        threading.Thread(target=self.build, args=(sheets, tool), daemon=True).start()
+
+    def build(self, sheets, tool):
+        start = time.perf_counter()
+        try:
+            pages, summary = contact_sheets(sheets, tool=tool, title=self.title)
+        except Exception as e:
+            pages, summary = [], f"❌ Preview failed: {e}"
+        self.app.bus.call(self.show_pages, pages, summary, time.perf_counter() - start)
+
+    def show_pages(self, pages, summary, seconds):
+        if not self.window.winfo_exists():
+            return
+        self.pages = pages
+        self.summary = f"{summary} ({seconds:.1f}s)"
+        self.show_page(0)
+
+    def show_page(self, index):
+        if not self.pages:
+            if self.summary:
+                self.status.configure(text=self.summary)
+            return
+        self.index = max(0, min(index, len(self.pages) - 1))
+        page = self.pages[self.index]
+        scale = min(960 / page.width, 690 / page.height, 1.0)
+        size = (int(page.width * scale), int(page.height * scale))
+        self.image_label.configure(image=ctk.CTkImage(light_image=page, dark_image=page, size=size))
+        self.status.configure(text=f"Page {self.index + 1}/{len(self.pages)} — {self.summary}")
+
+    def save_pages(self):
+        if not self.pages:
+            return
+        folder = self.output_folder or filedialog.askdirectory(title="Select Folder for the Layout Preview")
+        if not folder:
+            return
+        paths = save_contact_sheets(self.pages, folder)
+        messagebox.showinfo("Saved", f"Saved {len(paths)} page(s) to:\n{folder}")
+
+
+class SharedQueueWindow:
+    """Sends sheets to a shared spool folder and/or works on it (see spool.py)."""
+
+    def __init__(self, parent, app, dark_mode=False):
+        self.app = app
+        self.window = ctk.CTkToplevel(parent)
+        self.window.title("GT Crop - Shared Queue")
+        self.window.geometry("640x480")
+
+        # Theme colors
+        self.text_color = "white" if dark_mode else "black"
+        self.window.configure(fg_color="#2b2b2b" if dark_mode else "#f5f5f5")
+
+        self.spool_dir = load_config().get("spool_dir", "")
+        self.stop_event = None
+
+        ctk.CTkLabel(self.window, text="Shared Queue", font=("Segoe UI", 20, "bold"), text_color=self.text_color).pack(pady=15)
+
+        folder_frame = ctk.CTkFrame(self.window, fg_color="transparent")
+        folder_frame.pack(fill="x", padx=20, pady=5)
+        self.folder_label = ctk.CTkLabel(folder_frame, text=f"Spool: {self.spool_dir or 'Not selected'}", text_color="gray", wraplength=420, justify="left")
+        self.folder_label.pack(side="left")
+        ctk.CTkButton(folder_frame, text="Select Spool Folder", command=self.select_spool, width=140).pack(side="right")
+
+        controls = ctk.CTkFrame(self.window, fg_color="transparent")
+        controls.pack(fill="x", padx=20, pady=10)
+        ctk.CTkButton(controls, text="📤 Queue Valid Files", command=self.enqueue_files, width=160).pack(side="left", padx=5)
+        self.btn_worker = ctk.CTkButton(controls, text="▶ Start Worker", command=self.toggle_worker, fg_color="#4CAF50", width=140)
+        self.btn_worker.pack(side="right", padx=5)
+
+        self.status_text = ctk.CTkTextbox(self.window, width=580, height=260)
+        self.status_text.pack(pady=10, padx=20)
+
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh_status()
+
+    def select_spool(self):
+        folder = filedialog.askdirectory(title="Select Shared Spool Folder")
+        if folder:
+            self.spool_dir = folder
+            spool.init_spool(folder)
+            update_config(spool_dir=folder)
+            self.folder_label.configure(text=f"Spool: {folder}")
+
+    def enqueue_files(self):
+        if not self.spool_dir:
+            messagebox.showwarning("No Spool", "Please select a spool folder.")
+            return
+        if not self.app.output_folder:
+            messagebox.showwarning("No Output", "Please select an output folder in the main window.")
+            return
+        valid_files = [f for f in self.app.input_files if f['valid']]
+        if not valid_files:
+            messagebox.showwarning("No Valid Files", "No valid sheets to queue!")
+            return
+        items = [(f['path'], f['page']) for f in valid_files]
+        ids = spool.enqueue(self.spool_dir, items, self.app.output_folder, tool="split")
+        messagebox.showinfo("Queued", f"Queued {len(ids)} sheet(s) for any GT Crop worker.")
+
+    def toggle_worker(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.stop_event = None
+            self.btn_worker.configure(text="▶ Start Worker", fg_color="#4CAF50")
+            return
+        if not self.spool_dir:
+            messagebox.showwarning("No Spool", "Please select a spool folder.")
+            return
+        self.stop_event = threading.Event()
+        threading.Thread(
+            target=spool.run_worker,
+            args=(self.spool_dir,),
+            kwargs={"threads": default_workers, "stop_event": self.stop_event},
+            daemon=True
+        ).start()
+        self.btn_worker.configure(text="⏹ Stop Worker", fg_color="#F44336")
+
+    def refresh_status(self):
+        if not self.window.winfo_exists():
+            return
+        if self.spool_dir and os.path.isdir(self.spool_dir):
+            counts, nodes = spool.spool_status(self.spool_dir)
+            lines = [
+                f"Pending: {counts['pending']}   Active: {counts['active']}   "
+                f"Done: {counts['done']}   Failed: {counts['failed']}",
+                "",
+                "Workers:",
+            ]
+            for n in nodes:
+                lines.append(f"   • {n['node']}: {n['ok']} ok, {n['failed']} failed, {n['sheets_per_min']} sheets/min")
+            self.status_text.delete("1.0", "end")
+            self.status_text.insert("end", "\n".join(lines) + "\n")
+        self.window.after(2000, self.refresh_status)
+
+    def on_close(self):
+        # A running worker finishes its current sheet and stops
+        if self.stop_event is not None:
+            self.stop_event.set()
+        self.window.destroy()
+
+
+class ResamplingWindow:
+    """Resampling tier of each tool (see resample.py) and a comparison on sample sheets."""
+
+    def __init__(self, parent, app, dark_mode=False):
+        self.app = app
+        self.window = ctk.CTkToplevel(parent)
+        self.window.title("GT Crop - Resampling")
+        self.window.geometry("560x460")
+
+        # Theme colors
+        self.text_color = "white" if dark_mode else "black"
+        self.window.configure(fg_color="#2b2b2b" if dark_mode else "#f5f5f5")
+
+        ctk.CTkLabel(self.window, text="Resampling", font=("Segoe UI", 20, "bold"), text_color=self.text_color).pack(pady=15)
+        ctk.CTkLabel(self.window, text="draft: reduce + BILINEAR   standard: BICUBIC   print: LANCZOS",
+                     text_color="gray").pack(padx=20, anchor="w")
+
+        for tool, label in resample_tools.items():
+            row = ctk.CTkFrame(self.window, fg_color="transparent")
+            row.pack(fill="x", padx=20, pady=4)
+            ctk.CTkLabel(row, text=label, text_color=self.text_color, width=120, anchor="w").pack(side="left")
+            var = ctk.StringVar(value=resample_tier(tool))
+            ctk.CTkOptionMenu(row, values=list(resample_tiers), variable=var, width=140,
+                              command=partial(set_resample_tier, tool)).pack(side="left")
+
+        controls = ctk.CTkFrame(self.window, fg_color="transparent")
+        controls.pack(fill="x", padx=20, pady=10)
+        self.compare_tool = ctk.StringVar(value="split")
+        ctk.CTkOptionMenu(controls, values=["split", "crop_mark"], variable=self.compare_tool, width=120).pack(side="left", padx=5)
+        self.btn_compare = ctk.CTkButton(controls, text="⚖️ Compare on Sample Sheets", command=self.compare, width=200)
+        self.btn_compare.pack(side="left", padx=5)
+
+        self.report = ctk.CTkTextbox(self.window, width=500, height=180, font=("Consolas", 12))
+        self.report.pack(pady=10, padx=20)
+
+    def compare(self):
+        paths = filedialog.askopenfilenames(title="Select Sample Sheets", filetypes=sheet_filetypes)
+        if not paths:
+            return
+        tool = self.compare_tool.get()
+        self.btn_compare.configure(state="disabled")
+        self.report.delete("1.0", "end")
+        self.report.insert("end", f"Rendering {len(paths)} sheet(s) with each tier...\n")
+
+        def run():
+            try:
+                text = format_comparison(compare_tiers(paths, tool=tool))
+            except Exception as e:
+                text = f"❌ Comparison failed: {e}"
+            self.app.bus.call(self.show_report, text)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def show_report(self, text):
+        if not self.window.winfo_exists():
+            return
+        self.btn_compare.configure(state="normal")
+        self.report.delete("1.0", "end")
+        self.report.insert("end", text + "\n\nPSNR / SSIM of the pages against the print (LANCZOS) tier.\n")
+
+
+class JobQueueWindow:
+    """Jobs of the local queue (see jobqueue.py) with progress, ETA, priority and cancel."""
+
+    def __init__(self, parent, app, dark_mode=False):
+        self.app = app
+        self.window = ctk.CTkToplevel(parent)
+        self.window.title("GT Crop - Job Queue")
+        self.window.geometry("760x520")
+
+        # Theme colors
+        self.text_color = "white" if dark_mode else "black"
+        self.window.configure(fg_color="#2b2b2b" if dark_mode else "#f5f5f5")
+
+        ctk.CTkLabel(self.window, text="Job Queue", font=("Segoe UI", 20, "bold"), text_color=self.text_color).pack(pady=15)
+
+        self.list_frame = ctk.CTkScrollableFrame(self.window, height=340, fg_color="transparent")
+        self.list_frame.pack(fill="both", expand=True, padx=20, pady=5)
+        self.rows = {}  # job id -> widgets of its row
+
+        controls = ctk.CTkFrame(self.window, fg_color="transparent")
+        controls.pack(fill="x", padx=20, pady=10)
+        ctk.CTkButton(controls, text="🔄 Queue Rotate Folder", command=self.queue_rotate, width=170).pack(side="left", padx=5)
+        ctk.CTkButton(controls, text="🔧 Queue Fix DPI Folder", command=self.queue_fix_dpi, width=170).pack(side="left", padx=5)
+        ctk.CTkButton(controls, text="🧹 Clear Finished", command=self.app.jobs.clear_finished, width=130).pack(side="right", padx=5)
+
+        self.app.bus.subscribe("queue.changed", lambda job: self.refresh())
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh_timer()
+
+    def queue_rotate(self):
+        folder = filedialog.askdirectory(title="Select Folder to Rotate Images")
+        if not folder:
+            return
+        entries = list_images(folder, extensions=image_extensions | {'.tif', '.tiff'}, recursive=False)
+        plan = plan_rotation(os.path.basename(e.path) for e in entries)
+        if not plan:
+            messagebox.showinfo("Info", "No image files found.")
+            return
+        items = [(os.path.join(folder, filename), method) for filename, method in plan]
+        self.app.jobs.add(os.path.basename(folder) or folder, "rotate", items, folder)
+
+    def queue_fix_dpi(self):
+        folder = filedialog.askdirectory(title="Select Folder with Sheets to Convert to 300 DPI")
+        if not folder:
+            return
+        output_folder = filedialog.askdirectory(title="Select Folder to Save Corrected Files")
+        if not output_folder:
+            return
+        items = [(e.path,) for e in list_images(folder, recursive=False)]
+        if not items:
+            messagebox.showinfo("Info", "No image files found.")
+            return
+        self.app.jobs.add(os.path.basename(folder) or folder, "fix_dpi", items, output_folder)
+
+    def refresh_timer(self):
+        # ETAs move even when no sheet finishes
+        if not self.window.winfo_exists():
+            return
+        self.refresh()
+        self.window.after(2000, self.refresh_timer)
+
+    def refresh(self):
+        snapshot = self.app.jobs.snapshot()
+        for job_id in set(self.rows) - {job.id for job, _ in snapshot}:
+            self.rows.pop(job_id)["frame"].destroy()
+        for job, eta in snapshot:
+            row = self.rows.get(job.id) or self.add_row(job)
+            total = len(job.items)
+            text = f"{job.name} — {job_tools[job.tool][0]}   {job.done_count}/{total}"
+            if job.failed_count:
+                text += f" ({job.failed_count} failed)"
+            if job.state in ("queued", "running"):
+                status = format_eta(eta)
+            elif job.state == "paused":
+                status = "⏸ Paused"
+            else:
+                status = "✅ Done" if job.state == "done" else "⏹ Cancelled"
+            row["label"].configure(text=text)
+            row["status"].configure(text=f"{priorities[job.priority]} · {status}")
+            row["progress"].set(job.done_count / total if total else 1)
+            active = job.state in ("queued", "running")
+            if job.state == "paused":
+                row["rush"].configure(text="▶ Resume", state="normal")
+            else:
+                row["rush"].configure(text="⬇ Normal" if job.priority else "⬆ Rush", state="normal" if active else "disabled")
+            row["cancel"].configure(state="normal" if active or job.state == "paused" else "disabled")
+            # Keep rows in display order (priority, then age)
+            row["frame"].pack_forget()
+            row["frame"].pack(fill="x", pady=3)
+
+    def rush_or_resume(self, job):
+        if job.state == "paused":
+            self.app.jobs.resume(job.id)
+        else:
+            self.app.jobs.set_priority(job.id, 0 if job.priority else 1)
+
+    def add_row(self, job):
+        frame = ctk.CTkFrame(self.list_frame)
+        top = ctk.CTkFrame(frame, fg_color="transparent")
+        top.pack(fill="x", padx=8, pady=(6, 0))
+        label = ctk.CTkLabel(top, text="", anchor="w", text_color=self.text_color)
+        label.pack(side="left", fill="x", expand=True)
+        cancel = ctk.CTkButton(top, text="✖ Cancel", width=80, fg_color="#F44336",
+                               command=lambda: self.app.jobs.cancel(job.id))
+        cancel.pack(side="right", padx=(5, 0))
+        rush = ctk.CTkButton(top, text="", width=90, command=lambda: self.rush_or_resume(job))
+        rush.pack(side="right", padx=(5, 0))
+        bottom = ctk.CTkFrame(frame, fg_color="transparent")
+        bottom.pack(fill="x", padx=8, pady=(2, 6))
+        progress = ctk.CTkProgressBar(bottom)
+        progress.pack(side="left", fill="x", expand=True)
+        status = ctk.CTkLabel(bottom, text="", width=180, anchor="e", text_color="gray")
+        status.pack(side="right", padx=(10, 0))
+        row = {"frame": frame, "label": label, "status": status, "progress": progress, "rush": rush, "cancel": cancel}
+        self.rows[job.id] = row
+        return row
+
+    def on_close(self):
+        # The jobs keep running, this is only the view
+        self.app.bus.unsubscribe("queue.changed")
+        self.window.destroy()
+
+
 class AlbumValidator:
-    def __init__(self, window, dark_mode=False):
+    def __init__(self, window, dark_mode=False, app=None):
         self.window = window
         self.dark_mode = dark_mode
+        # Results from the duplicate check arrive through the main window's UI bus
+        self.bus = app.bus if app else UIBus(self.window)
         
         # Theme
         bg = "#2b2b2b" if dark_mode else "#f5f5f5"
@@ -706,8 +1392,8 @@ class AlbumValidator:
             self.validate_album(folder)
 
     def validate_album(self, folder):
-        image_extensions = {'.jpg', '.jpeg', '.png'}
-        files = [os.path.join(folder, f) for f in os.listdir(folder) if any(f.lower().endswith(ext) for ext in image_extensions)]
+        # An album is a single folder, sub-folders (e.g. an output folder) are not part of it
+        files = [entry.path for entry in list_images(folder, extensions=sheet_extensions, recursive=False)]
 
         if not files:
             self.result_text.insert("end", "No image files found in the folder.\n")
@@ -719,31 +1405,37 @@ class AlbumValidator:
         size_counts = {}
         invalid_files = []
         file_details = []
+        album_sheets = []  # (path, page) of every readable sheet, for the duplicate check
 
         for file_path in files:
             filename = os.path.basename(file_path)
             try:
-                from PIL import Image
-                img = Image.open(file_path)
-                w_in = img.width / dpi
-                h_in = img.height / dpi
+                # Every page of a multi-page TIFF/PDF is a sheet of its own
+                sheets = list_pages(file_path)
+            except Exception as e:
+                invalid_files.append(f"{filename} (error: {str(e)[:30]}...)")
+                file_details.append((filename, None, False))
+                continue
+
+            for sheet in sheets:
+                album_sheets.append((file_path, sheet.page))
+                label = sheet_label(file_path, sheet.page)
+                w_in = sheet.size[0] / dpi
+                h_in = sheet.size[1] / dpi
 
                 if is_valid_sheet(w_in, h_in):
                     normalized = tuple(sorted((round(w_in, 2), round(h_in, 2))))
                     size_counts[normalized] = size_counts.get(normalized, 0) + 1
-                    file_details.append((filename, normalized, True))
+                    file_details.append((label, normalized, True))
                 else:
-                    invalid_files.append(filename)
-                    file_details.append((filename, (w_in, h_in), False))
-            except Exception as e:
-                invalid_files.append(f"{filename} (error: {str(e)[:30]}...)")
-                file_details.append((filename, None, False))
+                    invalid_files.append(label)
+                    file_details.append((label, (w_in, h_in), False))
 
-        total = len(files)
+        total = len(file_details)
         valid_count = total - len(invalid_files)
 
         self.result_text.insert("end", f"📊 Summary:\n")
-        self.result_text.insert("end", f"   Total files: {total}\n")
+        self.result_text.insert("end", f"   Total sheets: {total}\n")
         self.result_text.insert("end", f"   Valid sheets: {valid_count}\n")
         self.result_text.insert("end", f"   Invalid/Unreadable: {len(invalid_files)}\n\n")
 
@@ -773,13 +1465,9 @@ class AlbumValidator:
 
         # --- DPI Correction Logic ---
         incorrect_dpi_files = []
-        for filename, _, _ in file_details:
-             fpath = os.path.join(folder, filename)
+        for fpath in files:
              try:
-                 img = Image.open(fpath)
-                 d = img.info.get('dpi', (72, 72))
-                 if isinstance(d, tuple): d = d[0]
-                 if abs(d - 300) > 5: # Tolerance
+                 if needs_dpi_fix(fpath):
                      incorrect_dpi_files.append(fpath)
              except:
                  pass
@@ -793,6 +1481,36 @@ class AlbumValidator:
                                 command=lambda: self.fix_dpi(incorrect_dpi_files), fg_color="#FF9800")
             btn.pack(pady=10)
 
+        # Duplicate spreads: hashed in the background, the report above is already usable
+        if len(album_sheets) > 1:
+            self.result_text.insert("end", "\n🔎 Checking for duplicate sheets...\n")
+            threading.Thread(target=self.find_duplicates, args=(album_sheets,), daemon=True).start()
+
+    def find_duplicates(self, album_sheets):
+        start = time.perf_counter()
+        try:
+            cache = ValidationCache()
+            hashes = dupes.hash_sheets(album_sheets, cache)
+            pairs = dupes.find_duplicates(hashes)
+        except Exception as e:
+            self.bus.call(self.show_duplicate_error, str(e))
+            return
+        self.bus.call(self.show_duplicates, pairs, len(hashes), time.perf_counter() - start)
+        # After the report: a save may also sweep the cache for deleted sheets
+        cache.save()
+
+    def show_duplicate_error(self, error):
+        self.result_text.insert("end", f"❌ Duplicate check failed: {error}\n")
+
+    def show_duplicates(self, pairs, hashed, seconds):
+        if not pairs:
+            self.result_text.insert("end", f"✅ No duplicate sheets ({hashed} sheets checked in {seconds:.1f}s).\n")
+            return
+        self.result_text.insert("end", f"⚠️ POSSIBLE DUPLICATES ({len(pairs)} pairs, checked in {seconds:.1f}s):\n")
+        for (path_a, page_a), (path_b, page_b), distance in pairs:
+            similarity = "identical" if distance == 0 else f"{100 - distance * 100 // 64}% similar"
+            self.result_text.insert("end", f"   • {sheet_label(path_a, page_a)} ↔ {sheet_label(path_b, page_b)} ({similarity})\n")
+
     def fix_dpi(self, files_to_fix):
         output_folder = filedialog.askdirectory(title="Select Folder to Save Corrected Files")
         if not output_folder: return
@@ -0,0 +1,400 @@
+"""
+Output sinks for rendered pages.
+
+Every tool encodes its pages to JPEG and hands a whole sheet to a sink:
+
+    sink.begin(keys)              # album order, one key per sheet: (path, page)
+    sink.add_sheet(key, pages)    # pages: [EncodedPage, ...], from any worker thread
+    sink.skip(key)                # sheet failed, don't wait for it
+    sink.close()
+
+FileSink (the default) writes one JPEG per page as before. PdfSink and
+ZipSink stream the pages into one container file in album order: a sheet
+that finishes early waits (as JPEG bytes) until the sheets before it are
+written, and written pages are not kept. WriteBehindSink writes the same
+JPEGs as FileSink from a background writer, for slow (network) folders.
+
+Container files are created by open_sink() itself, so an output that can't
+be written (a PDF open in another program, a folder of that name) fails
+before the batch starts instead of in the middle of it.
+"""
+import io
+import os
+import time
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+import weakref
+from collections import namedtuple, deque
+
+from PIL import Image
+
+# One encoded page. size_in is the printed page size in inches (w, h).
+EncodedPage = namedtuple("EncodedPage", ["filename", "data", "size_in", "icc_profile"])
+
+# Choices offered in the GUI: name -> (label, container extension or None)
+sink_kinds = {
+    "files": ("JPEG files", None),
+    "pdf": ("One PDF", ".pdf"),
+    "zip": ("One ZIP (stored)", ".zip"),
+    "staged": ("JPEGs, write-behind", None),
+}
+
+# Open WriteBehindSinks, for pending_writes()
+_write_behind = weakref.WeakSet()
+
+
+class FileSink:
+    """Writes every page as <output_folder>/<filename> as soon as it arrives."""
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = output_folder
+
+    def begin(self, keys):
+        pass
+
+    def add_sheet(self, key, pages):
+        for page in pages:
+            with open(os.path.join(self.output_folder, page.filename), "wb") as f:
+                f.write(page.data)
+
+    def skip(self, key):
+        pass
+
+    def close(self):
+        pass
+
+
+class _OrderedSink:
+    """
+    Reorders sheets into album order before they reach _write_page(). The
+    container is opened here; raises OSError if it can't be created.
+
+    After a failed write (disk full, share gone) the container is incomplete:
+    nothing more is written, the pages that didn't make it are listed in
+    `failed` and every later add_sheet() raises, so those sheets fail.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pages_written = 0
+        self.failed = []  # (filename, None, error), like WriteBehindSink
+        self.error = None
+        self._lock = threading.Lock()
+        self._order = []
+        self._next = 0
+        self._ready = {}  # key -> pages, or None for a skipped sheet
+        self._open()
+
+    def begin(self, keys):
+        with self._lock:
+            self._order = list(keys)
+            self._next = 0
+            self._ready = {}
+
+    def add_sheet(self, key, pages):
+        with self._lock:
+            self._ready[key] = pages
+            self._flush()
+            if self.error is not None:
+                raise OSError(f"Cannot write {os.path.basename(self.path)}: {self.error}")
+
+    def skip(self, key):
+        with self._lock:
+            self._ready[key] = None
+            self._flush()
+
+    def _flush(self):
+        while self._next < len(self._order) and self._order[self._next] in self._ready:
+            pages = self._ready.pop(self._order[self._next])
+            self._next += 1
+            for page in pages or ():
+                if self.error is None:
+                    try:
+                        self._write_page(page)
+                        self.pages_written += 1
+                        continue
+                    except Exception as e:
+                        self.error = e
+                self.failed.append((page.filename, None, str(self.error)))
+
+    def close(self):
+        with self._lock:
+            # Sheets never reported (batch cancelled) are left out
+            for key in self._order[self._next:]:
+                self._ready.setdefault(key, None)
+            self._flush()
+            self._close()
+
+
+class ZipSink(_OrderedSink):
+    """Uncompressed ZIP: JPEGs don't shrink, so ZIP_STORED only saves the CPU."""
+
+    def _open(self):
+        self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def _write_page(self, page):
+        self._zip.writestr(page.filename, page.data)
+
+    def _close(self):
+        self._zip.close()
+
+
+class PdfSink(_OrderedSink):
+    """
+    Minimal streaming PDF writer: each page is one JPEG image (DCTDecode,
+    so it is embedded as is, never re-encoded) filling a MediaBox of the
+    page's paper size. Only the object offsets are kept until close().
+    """
+
+    def _open(self):
+        self._file = open(self.path, "wb")
+        try:
+            self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        except OSError:
+            self._file.close()
+            raise
+        self._offsets = {}
+        self._kids = []
+        self._icc = {}  # sha1 -> object id of an ICCBased color space
+        self._next_id = 3  # 1: catalog, 2: page tree (written at close)
+
+    def _new_id(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id, body, stream=None):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f"{obj_id} 0 obj\n".encode())
+        self._file.write(body)
+        if stream is not None:
+            self._file.write(b"\nstream\n")
+            self._file.write(stream)
+            self._file.write(b"\nendstream")
+        self._file.write(b"\nendobj\n")
+
+    def _color_space(self, icc_profile):
+        if not icc_profile:
+            return b"/DeviceRGB"
+        digest = hashlib.sha1(icc_profile).hexdigest()
+        if digest not in self._icc:
+            obj_id = self._new_id()
+            self._write_object(obj_id, f"<< /N 3 /Alternate /DeviceRGB /Length {len(icc_profile)} >>".encode(), icc_profile)
+            self._icc[digest] = obj_id
+        return f"[/ICCBased {self._icc[digest]} 0 R]".encode()
+
+    def _write_page(self, page):
+        # Only the header is parsed, for the pixel size
+        with Image.open(io.BytesIO(page.data)) as img:
+            w_px, h_px = img.size
+
+        w_pt = round(page.size_in[0] * 72, 2)
+        h_pt = round(page.size_in[1] * 72, 2)
+        color_space = self._color_space(page.icc_profile)
+
+        image_id = self._new_id()
+        self._write_object(
+            image_id,
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+            b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>" % (w_px, h_px, color_space, len(page.data)),
+            page.data,
+        )
+        content = f"q {w_pt} 0 0 {h_pt} 0 0 cm /Im0 Do Q".encode()
+        content_id = self._new_id()
+        self._write_object(content_id, f"<< /Length {len(content)} >>".encode(), content)
+        page_id = self._new_id()
+        self._write_object(
+            page_id,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w_pt} {h_pt}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>".encode(),
+        )
+        self._kids.append(page_id)
+
+    def _close(self):
+        try:
+            kids = " ".join(f"{k} 0 R" for k in self._kids)
+            self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>".encode())
+            self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+            xref = self._file.tell()
+            size = self._next_id
+            self._file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+            for obj_id in range(1, size):
+                # An object whose write failed has no offset; mark it free
+                offset = self._offsets.get(obj_id)
+                self._file.write(f"{offset:010d} 00000 n \n".encode() if offset is not None
+                                 else b"0000000000 65535 f \n")
+            self._file.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        finally:
+            self._file.close()
+
+
+class WriteBehindSink:
+    """
+    Separate JPEGs like FileSink, written behind the workers for output
+    folders on a network share. add_sheet() queues the encoded pages and
+    returns; background writers copy them to output_folder one whole file
+    per write, into a .part file that is fsynced and then renamed, so a
+    page in the output is always complete.
+
+    Up to `max_memory` bytes of pages wait in memory, the rest is staged in
+    a local folder (`staging_dir`, the temp folder by default). Past
+    `max_staged` bytes add_sheet() blocks until the writers catch up. A
+    failed write is retried with back-off; pages that still fail are kept
+    in staging and listed in `failed`. close() waits for the backlog.
+    """
+
+    def __init__(self, output_folder, staging_dir=None, max_memory=256 * 2 ** 20,
+                 max_staged=4 * 2 ** 30, writers=1, retries=3):
+        self.output_folder = output_folder
+        self.path = output_folder
+        self.staging_dir = staging_dir
+        self.max_memory = max_memory
+        self.max_staged = max_staged
+        self.retries = retries
+        self.pages_written = 0
+        self.bytes_written = 0
+        self.failed = []  # (filename, staged copy, error)
+        self._cond = threading.Condition()
+        self._queue = deque()  # (filename, data or None, staged path or None, size)
+        self._memory = 0
+        self._staged = 0
+        self._busy = 0
+        self._closing = False
+        self._staging = None
+        self._threads = [threading.Thread(target=self._writer, daemon=True, name="gtcrop-writer")
+                         for _ in range(max(1, writers))]
+        for t in self._threads:
+            t.start()
+        _write_behind.add(self)
+
+    def begin(self, keys):
+        pass
+
+    def add_sheet(self, key, pages):
+        for page in pages:
+            size = len(page.data)
+            with self._cond:
+                in_memory = self._memory + size <= self.max_memory
+                while not in_memory and self._staged and self._staged + size > self.max_staged:
+                    self._cond.wait()
+                    in_memory = self._memory + size <= self.max_memory
+                if in_memory:
+                    self._memory += size
+                else:
+                    self._staged += size
+            if in_memory:
+                item = (page.filename, page.data, None, size)
+            else:
+                item = (page.filename, None, self._stage(page), size)
+            with self._cond:
+                self._queue.append(item)
+                self._cond.notify_all()
+
+    def skip(self, key):
+        pass
+
+    def _stage(self, page):
+        with self._cond:
+            if self._staging is None:
+                self._staging = tempfile.mkdtemp(prefix="gtcrop_staging_", dir=self.staging_dir)
+        staged = os.path.join(self._staging, page.filename)
+        with open(staged, "wb") as f:
+            f.write(page.data)
+        return staged
+
+    def backlog(self):
+        """(pages, bytes) not yet in the output folder."""
+        with self._cond:
+            return len(self._queue) + self._busy, self._memory + self._staged
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                filename, data, staged, size = self._queue.popleft()
+                self._busy += 1
+            error = self._write(filename, data, staged)
+            with self._cond:
+                self._busy -= 1
+                if data is not None:
+                    self._memory -= size
+                else:
+                    self._staged -= size
+                if error is None:
+                    self.pages_written += 1
+                    self.bytes_written += size
+                else:
+                    self.failed.append((filename, staged, error))
+                self._cond.notify_all()
+            if error is None and staged:
+                os.remove(staged)
+
+    def _write(self, filename, data, staged):
+        final = os.path.join(self.output_folder, filename)
+        part = final + ".part"
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(8.0, 0.5 * 2 ** attempt))
+            try:
+                if data is None:
+                    with open(staged, "rb") as f:
+                        data = f.read()
+                # One write of the whole page, unbuffered, then durable before it gets its name
+                with open(part, "wb", buffering=0) as f:
+                    f.write(data)
+                    os.fsync(f.fileno())
+                os.replace(part, final)
+                return None
+            except OSError as e:
+                error = e
+        if staged is None:
+            # Keep what couldn't be written, the caller can copy it by hand
+            try:
+                staged = self._stage(EncodedPage(filename, data, None, None))
+            except OSError:
+                pass
+        return f"{error} (kept in {staged})" if staged else str(error)
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+        _write_behind.discard(self)
+        if self._staging and not self.failed:
+            shutil.rmtree(self._staging, ignore_errors=True)
+
+
+def pending_writes():
+    """(pages, bytes) still queued in every open WriteBehindSink."""
+    pages = size = 0
+    for sink in list(_write_behind):
+        p, b = sink.backlog()
+        pages += p
+        size += b
+    return pages, size
+
+
+def open_sink(kind, output_folder, name=None):
+    """
+    Sink for `kind` ("files", "staged", "pdf" or "zip"). Containers are written to
+    <output_folder>/<name>.pdf|.zip, `name` defaulting to the folder's name.
+    """
+    if kind == "files":
+        return FileSink(output_folder)
+    if kind == "staged":
+        return WriteBehindSink(output_folder)
+    if kind not in sink_kinds:
+        raise ValueError(f"Unknown output: {kind}")
+    name = name or os.path.basename(os.path.normpath(output_folder)) or "album"
+    path = os.path.join(output_folder, name + sink_kinds[kind][1])
+    return PdfSink(path) if kind == "pdf" else ZipSink(path)
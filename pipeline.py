@@ -0,0 +1,186 @@
+import io
+import os
+import threading
+from time import perf_counter
+
+import numpy as np
+from PIL import Image
+
+from inputs import dpi_tolerance, open_sheet, sheet_base_name, source_dpi
+from processor import dpi, is_valid_sheet, page_rotation, page_save_kwargs, plan_sheet, render_pages, scaling_note
+from outputs import EncodedPage
+from resample import resample_tier, resize
+
+
+class PipelineReport:
+    """
+    Totals for a batch run in one-pass mode, next to an estimate of what the
+    step-by-step workflow (Fix DPI → Process → Rotate Pages, each writing
+    JPEGs) would have cost for the same sheets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sheets = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.saved_bytes = 0
+        self.saved_seconds = 0.0
+        self.round_trips_saved = 0
+        self._sources = set()
+
+    def add(self, source=None, **counters):
+        """One finished sheet. `source` is (path, file size) of the file it came from."""
+        with self._lock:
+            self.sheets += 1
+            if source is not None and source[0] not in self._sources:
+                # The pages of a multi-page file share its bytes, so each file counts once
+                self._sources.add(source[0])
+                self.bytes_read += source[1]
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self):
+        mb = 1024 * 1024
+        return (
+            f"One-pass pipeline: {self.sheets} sheets, read {self.bytes_read / mb:.1f} MB, "
+            f"wrote {self.bytes_written / mb:.1f} MB in {self.seconds:.1f}s. "
+            f"Step-by-step estimate: ~{self.saved_bytes / mb:.1f} MB more I/O, "
+            f"~{self.saved_seconds:.1f}s more work, "
+            f"{self.round_trips_saved} lossy JPEG round-trips avoided."
+        )
+
+
+def spill_to_scratch(img, scratch_path):
+    """
+    Writes an RGB image as a raw RGBX .npy file through a memory map and
+    returns an image mapped onto it. The pixels then live in the OS page
+    cache instead of the worker's heap, and nothing is JPEG-encoded.
+    """
+    w, h = img.size
+    raw = np.lib.format.open_memmap(scratch_path, mode="w+", dtype=np.uint8, shape=(h, w, 4))
+    raw[..., :3] = np.asarray(img)
+    raw[..., 3] = 255
+    raw.flush()
+    del raw
+    return load_scratch(scratch_path)
+
+
+def load_scratch(scratch_path):
+    """Maps a raw scratch file written by spill_to_scratch (no decode, no copy)."""
+    raw = np.load(scratch_path, mmap_mode="r")
+    h, w = raw.shape[:2]
+    return Image.frombuffer("RGBX", (w, h), raw, "raw", "RGBX", 0, 1)
+
+
+def _dpi_fix_applies(size, current_dpi):
+    """
+    Fix DPI only resizes a sheet that is not an approved size at 300 DPI but
+    is one at its stored DPI. A missing tag says nothing about the scan, so
+    it is never taken for 72.
+    """
+    if not current_dpi or abs(current_dpi - dpi) <= dpi_tolerance:
+        return False
+    w, h = size
+    return not is_valid_sheet(w / dpi, h / dpi) and is_valid_sheet(w / current_dpi, h / current_dpi)
+
+
+def run_pipeline(image_path, output_folder, page=None, tool="split", fix_dpi=True,
+                 rotate=True, scratch_dir=None, report=None, sink=None):
+    """
+    Fix DPI, split (or crop & mark) and rotate one sheet in a single pass:
+    the source is decoded once and each page is encoded once.
+
+    With `scratch_dir`, the DPI-corrected sheet is handed to the split stage
+    through a memory-mapped raw file instead of the heap. `report` (a
+    PipelineReport) collects I/O and timing for the batch, and `sink` takes
+    the pages instead of output_folder as in process_sheet.
+    Returns (success, message) like process_sheet.
+    """
+    start = perf_counter()
+    try:
+        img = open_sheet(image_path, page)
+        current_dpi = source_dpi(image_path, page)
+    except Exception as e:
+        return False, f"Cannot open: {e}"
+    decode_seconds = perf_counter() - start
+    src_pixels = img.width * img.height
+    bytes_read = os.path.getsize(image_path)
+
+    # --- Fix DPI (same resize as convert_to_300dpi, without the JPEG in between) ---
+    dpi_pixels = 0
+    if fix_dpi and _dpi_fix_applies(img.size, current_dpi):
+        new_w = int(img.width / current_dpi * dpi)
+        new_h = int(img.height / current_dpi * dpi)
+        img = resize(img, (new_w, new_h), resample_tier("fix_dpi"))
+        dpi_pixels = new_w * new_h
+
+    plan, error = plan_sheet(*img.size, tool=tool)
+    if error:
+        return False, error
+
+    base_name = sheet_base_name(image_path, page)
+    save_kwargs = page_save_kwargs(img)  # the scratch copy has no info
+    scratch_path = None
+    if scratch_dir:
+        scratch_path = os.path.join(scratch_dir, f"{base_name}.npy")
+        img = spill_to_scratch(img, scratch_path)
+
+    try:
+        # --- Split + Rotate, one encode per page ---
+        bytes_written = 0
+        encode_seconds = 0.0
+        page_pixels = 0
+        timings = []
+        pages = []
+        for i, canvas in render_pages(img, plan, timings, resample_tier(tool)):
+            if rotate:
+                canvas = canvas.transpose(page_rotation[i])
+            t = perf_counter()
+            buf = io.BytesIO()
+            canvas.save(buf, "JPEG", **save_kwargs)
+            encode_seconds += perf_counter() - t
+            filename = f"{base_name}_page{i}.jpg"
+            if sink is None:
+                with open(os.path.join(output_folder, filename), "wb") as f:
+                    f.write(buf.getbuffer())
+            else:
+                pages.append(EncodedPage(filename, buf.getvalue(), (canvas.width / dpi, canvas.height / dpi),
+                                         save_kwargs.get("icc_profile")))
+            bytes_written += buf.tell()
+            page_pixels += canvas.width * canvas.height
+        if sink is not None:
+            sink.add_sheet((image_path, page), pages)
+    finally:
+        if scratch_path:
+            img = None
+            try:
+                os.remove(scratch_path)
+            except OSError:
+                pass  # still mapped on Windows, it gets overwritten next run
+
+    if report is not None:
+        # What the skipped steps would have cost, from this sheet's own rates
+        decode_rate = decode_seconds / max(src_pixels, 1)
+        encode_rate = encode_seconds / max(page_pixels, 1)
+        jpeg_bytes_per_pixel = bytes_written / max(page_pixels, 1)
+        saved_bytes = 0
+        saved_seconds = 0.0
+        round_trips = 0
+        if dpi_pixels:
+            # Fix DPI writes a JPEG that Process reads back
+            saved_bytes += 2 * int(jpeg_bytes_per_pixel * dpi_pixels)
+            saved_seconds += (encode_rate + decode_rate) * dpi_pixels
+            round_trips += 1
+        if rotate:
+            # Rotate Pages reads, decodes, re-encodes and rewrites both pages
+            saved_bytes += 2 * bytes_written
+            saved_seconds += decode_rate * page_pixels + encode_seconds
+            round_trips += 2
+        report.add(source=(image_path, bytes_read), bytes_written=bytes_written,
+                   seconds=perf_counter() - start, saved_bytes=saved_bytes,
+                   saved_seconds=saved_seconds, round_trips_saved=round_trips)
+
+    paper_w, paper_h = plan.paper
+    return True, f"✅ One pass: {paper_w}×{paper_h}\" pages{scaling_note(plan, sum(timings))}"
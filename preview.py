@@ -0,0 +1,207 @@
+"""
+Layout proof of an album before the full render.
+
+Every sheet is planned by plan_sheet() from its header size, exactly as
+process_sheet / crop_and_mark_sheet would, and drawn from a draft decode
+(open_preview) into a tile:
+
+    left    the sheet with its split line (red)
+    right   both output pages: paper outline, where the half lands and the
+            crop-and-mark lines
+    below   name, paper, split axis and scaling; the 13x19 override of
+            14/15/16x24 sheets and sheets that would be skipped stand out
+
+Tiles are drawn on the shared worker pool and laid out on contact sheet
+pages (cols x rows tiles each).
+
+    python preview.py <output_folder> <sheets...> [--tool split|crop_mark]
+"""
+import os
+import sys
+import argparse
+import threading
+from collections import Counter
+
+from PIL import Image, ImageDraw, ImageFont
+
+from batch import map_limited
+from inputs import list_pages, open_preview, sheet_label
+from processor import plan_sheet, dpi, available_papers, find_best_paper_for_half_sheet, jpeg_save_kwargs
+
+tile_size = (420, 240)
+header_height = 44
+_pad = 8
+_caption = 40
+_sheet_box = (150, tile_size[1] - _caption - 2 * _pad)
+
+_split_color = (229, 57, 53)
+_paper_color = (120, 120, 120)
+_warn_color = (255, 152, 0)
+
+
+# The default font has no × or dashes, and the planner's messages use them
+_ascii = str.maketrans({"×": "x", "—": "-", "–": "-", "·": "-"})
+
+
+def _text(draw, xy, text, fill, size):
+    draw.text(xy, text.translate(_ascii), fill=fill, font=_font(size))
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1 has one bitmap size only
+        return ImageFont.load_default()
+
+
+def _fit(w, h, max_w, max_h):
+    scale = min(max_w / w, max_h / h)
+    return scale, max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def _is_override(plan):
+    # The paper the half would get on its own; anything else is the large-sheet override
+    (x0, y0, x1, y1) = plan.boxes[0]
+    best, _ = find_best_paper_for_half_sheet((x1 - x0) / dpi, (y1 - y0) / dpi, available_papers)
+    return tuple(best) != tuple(plan.paper)
+
+
+def sheet_tile(path, page=None, tool="split"):
+    """
+    (tile image, info) for one sheet. info is {"paper": (w, h) or None,
+    "override": bool, "error": message or None}.
+    """
+    tile = Image.new("RGB", tile_size, "white")
+    draw = ImageDraw.Draw(tile)
+    info = {"paper": None, "override": False, "error": None}
+    label = sheet_label(path, page)
+
+    try:
+        size = next(s.size for s in list_pages(path) if s.page == page)
+        plan, info["error"] = plan_sheet(*size, tool=tool)
+        thumb = open_preview(path, page, max_size=_sheet_box) if plan else None
+    except Exception as e:
+        plan, info["error"] = None, f"Cannot open: {e}"
+
+    draw.rectangle((0, 0, tile_size[0] - 1, tile_size[1] - 1), outline=(220, 220, 220))
+    _text(draw, (_pad, tile_size[1] - _caption), label[:60], "black", 13)
+    if plan is None:
+        _text(draw, (_pad, tile_size[1] - _caption + 18), info["error"][:70], _split_color, 12)
+        return tile, info
+
+    # The sheet, with the split line
+    thumb = thumb.convert("RGB")
+    scale, tw, th = _fit(*size, *_sheet_box)
+    thumb = thumb.resize((tw, th), Image.Resampling.BILINEAR)
+    sx, sy = _pad + (_sheet_box[0] - tw) // 2, _pad + (_sheet_box[1] - th) // 2
+    tile.paste(thumb, (sx, sy))
+    draw.rectangle((sx - 1, sy - 1, sx + tw, sy + th), outline=_paper_color)
+    x0, y0, x1, y1 = plan.boxes[0]
+    if plan.split_vertical:
+        x = sx + round(x1 * scale)
+        draw.line((x, sy - 4, x, sy + th + 3), fill=_split_color, width=2)
+    else:
+        y = sy + round(y1 * scale)
+        draw.line((sx - 4, y, sx + tw + 3, y), fill=_split_color, width=2)
+
+    # Both pages as they will be composed
+    area_x = 2 * _pad + _sheet_box[0]
+    box_w = (tile_size[0] - area_x - 2 * _pad) // 2
+    layout = plan.page
+    page_scale, pw, ph = _fit(*layout.canvas_size, box_w, _sheet_box[1])
+    for i, (bx0, by0, bx1, by1) in enumerate(plan.boxes):
+        px = area_x + i * (box_w + _pad) + (box_w - pw) // 2
+        py = _pad + (_sheet_box[1] - ph) // 2
+        draw.rectangle((px, py, px + pw, py + ph), fill="white", outline=_paper_color)
+        half = thumb.crop((round(bx0 * scale), round(by0 * scale), round(bx1 * scale), round(by1 * scale)))
+        iw = max(1, round(layout.image_size[0] * page_scale))
+        ih = max(1, round(layout.image_size[1] * page_scale))
+        tile.paste(half.resize((iw, ih), Image.Resampling.BILINEAR),
+                   (px + round(layout.offset[0] * page_scale), py + round(layout.offset[1] * page_scale)))
+        for lx0, ly0, lx1, ly1 in layout.mark_lines:
+            lx = px + round(lx0 * page_scale)
+            draw.line((lx, py + round(ly0 * page_scale), lx, py + round(ly1 * page_scale)), fill="black", width=1)
+
+    info["paper"] = plan.paper
+    info["override"] = tool == "split" and _is_override(plan)
+    method, factor = plan.scaling
+    text = f'{plan.paper[0]}x{plan.paper[1]}" - split {"left|right" if plan.split_vertical else "top/bottom"} - '
+    text += f"reduce /{factor}" if method == "reduce" else method
+    if info["override"]:
+        text += " - 13x19 override"
+    _text(draw, (_pad, tile_size[1] - _caption + 18), text, _warn_color if info["override"] else _paper_color, 12)
+    return tile, info
+
+
+def contact_sheets(sheets, tool="split", title="Album", cols=3, rows=6, workers=None, on_progress=None):
+    """
+    Layout proof pages for [(path, page), ...]. Returns (pages, summary),
+    pages being RGB images of cols x rows tiles in album order.
+    on_progress(done, total) is called from the worker threads.
+    """
+    sheets = list(sheets)
+    done = [0]
+    lock = threading.Lock()
+
+    def one(sheet):
+        result = sheet_tile(sheet[0], sheet[1], tool)
+        with lock:
+            done[0] += 1
+            count = done[0]
+        if on_progress:
+            on_progress(count, len(sheets))
+        return result
+
+    results = map_limited(one, sheets, workers)
+
+    papers = Counter(info["paper"] for _, info in results if info["paper"])
+    overrides = sum(1 for _, info in results if info["override"])
+    errors = sum(1 for _, info in results if info["error"])
+    summary = ", ".join(f'{n} on {w}x{h}"' for (w, h), n in papers.most_common())
+    if overrides:
+        summary += f", {overrides} by 13x19 override"
+    if errors:
+        summary += f", {errors} skipped"
+
+    per_page = cols * rows
+    n_pages = max(1, -(-len(results) // per_page))
+    pages = []
+    for p in range(n_pages):
+        chunk = results[p * per_page:(p + 1) * per_page]
+        used_rows = max(1, -(-len(chunk) // cols))
+        img = Image.new("RGB", (cols * tile_size[0], header_height + used_rows * tile_size[1]), (245, 245, 245))
+        draw = ImageDraw.Draw(img)
+        _text(draw, (_pad, 6), f"{title} - {len(sheets)} sheets - page {p + 1}/{n_pages}", "black", 16)
+        _text(draw, (_pad, 26), summary, _paper_color, 12)
+        for i, (tile, _) in enumerate(chunk):
+            img.paste(tile, ((i % cols) * tile_size[0], header_height + (i // cols) * tile_size[1]))
+        pages.append(img)
+    return pages, summary
+
+
+def save_contact_sheets(pages, output_folder, name="layout_preview"):
+    paths = []
+    for i, img in enumerate(pages, 1):
+        path = os.path.join(output_folder, f"{name}_{i:02d}.jpg")
+        img.save(path, "JPEG", **dict(jpeg_save_kwargs, quality=90))
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GT Crop layout proof")
+    parser.add_argument("output_folder")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--tool", choices=["split", "crop_mark"], default="split")
+    args = parser.parse_args(argv)
+
+    sheets = [(s.path, s.page) for f in args.files for s in list_pages(f)]
+    pages, summary = contact_sheets(sheets, tool=args.tool)
+    print(summary)
+    for path in save_contact_sheets(pages, args.output_folder):
+        print(f"Saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
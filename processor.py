@@ -1,5 +1,18 @@
-from PIL import Image, ImageFile, ImageDraw
+from PIL import Image, ImageFile
+import io
 import os
+import re
+import threading
+import uuid
+from time import perf_counter
+from collections import namedtuple
+from functools import lru_cache
+from scanner import list_images, image_extensions
+from compose import get_compositor
+from inputs import open_sheet, sheet_base_name
+from batch import run_batch
+from outputs import EncodedPage
+from resample import resample_tier, resize
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -7,6 +20,27 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
 dpi = 300
 margin_inch = 0.5
 
+# Encoder settings for every page GT Crop writes
+jpeg_save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0}
+
+def page_save_kwargs(img):
+    """jpeg_save_kwargs plus the sheet's ICC profile, so pages print like the sheet."""
+    icc_profile = img.info.get("icc_profile")
+    if icc_profile:
+        return dict(jpeg_save_kwargs, icc_profile=icc_profile)
+    return jpeg_save_kwargs
+
+def encode_page(canvas, filename, save_kwargs):
+    """JPEG-encodes a rendered page for an output sink (see outputs.py)."""
+    buf = io.BytesIO()
+    canvas.save(buf, "JPEG", **save_kwargs)
+    return EncodedPage(filename, buf.getvalue(), (canvas.width / dpi, canvas.height / dpi),
+                       save_kwargs.get("icc_profile"))
+
+# Rotation applied by "Rotate Pages" to the 1st/2nd page of each sheet
+# (odd files turn left, even files turn right)
+page_rotation = {1: Image.ROTATE_90, 2: Image.ROTATE_270}
+
 # Paper sizes available for printing (width, height) in inches
 available_papers = [
     (10, 16),
@@ -59,39 +93,80 @@ def find_best_paper_for_half_sheet(half_w_in, half_h_in, papers):
     best = min(candidates, key=lambda x: x[0] * x[1])
     return (best[0], best[1]), best[2]
 
-def process_sheet(image_path, output_folder):
-    try:
-        img = Image.open(image_path).convert("RGB")
-    except Exception as e:
-        return False, f"Cannot open: {e}"
-
-    w_px, h_px = img.size
+# Where one half of a sheet lands on its output page. Both halves of a sheet
+# share the same PageLayout, so it doubles as the key for reusable canvases.
+#   canvas_size: (w, h) of the page in pixels
+#   image_size:  (w, h) of the resized half
+#   offset:      (x, y) of the resized half on the page
+#   mark_lines:  ((x0, y0, x1, y1), ...) black crop-and-mark lines, already clipped
+PageLayout = namedtuple("PageLayout", ["canvas_size", "image_size", "offset", "mark_lines"])
+
+# Full plan for one sheet: chosen paper (inches), the two crop boxes, the page
+# layout and how each half gets from crop size to image size:
+#   ("copy", 1)         same size, the crop is placed as is
+#   ("reduce", f)       exact integer shrink, Image.reduce(f)
+#   ("lanczos", None)   anything else
+SheetPlan = namedtuple("SheetPlan", ["paper", "split_vertical", "boxes", "page", "scaling"])
+
+# Seconds per source pixel of a LANCZOS half, averaged over the session. Used
+# to report what reduce() saved on sheets that take the integer shrink.
+_lanczos_rate = [None]
+_lanczos_lock = threading.Lock()
+
+def _split_boxes(w_px, h_px, split_vertical):
+    if split_vertical:
+        w_px -= w_px % 2
+        mid = w_px // 2
+        return (0, 0, mid, h_px), (mid, 0, w_px, h_px)
+    h_px -= h_px % 2
+    mid = h_px // 2
+    return (0, 0, w_px, mid), (0, mid, w_px, h_px)
+
+def _fit_size(im_w, im_h, max_w, max_h):
+    if im_w == 0 or im_h == 0:
+        return im_w, im_h
+    scale = min(max_w / im_w, max_h / im_h)
+    return int(im_w * scale), int(im_h * scale)
+
+def _scaling(half_w, half_h, image_size):
+    im_w, im_h = image_size
+    if (half_w, half_h) == (im_w, im_h) or 0 in (im_w, im_h):
+        return ("copy", 1)
+    if im_w < half_w and half_w % im_w == 0:
+        f = half_w // im_w
+        if half_h == im_h * f:
+            return ("reduce", f)
+    return ("lanczos", None)
+
+def _page_layout(canvas_w, canvas_h, half_w, half_h, max_w, max_h, mark_margin_px=None):
+    im_w, im_h = _fit_size(half_w, half_h, max_w, max_h)
+    x = (canvas_w - im_w) // 2
+    y = (canvas_h - im_h) // 2
+
+    lines = []
+    # Only draw if the image is wide enough to have distinct margins
+    if mark_margin_px is not None and im_w >= int(1.0 * dpi):
+        for line_x in (x - mark_margin_px, x + im_w + mark_margin_px):
+            # 2px wide, from the top to the bottom edge of the image (inclusive)
+            x0, x1 = max(line_x, 0), min(line_x + 2, canvas_w)
+            y0, y1 = max(y, 0), min(y + im_h + 1, canvas_h)
+            if x0 < x1 and y0 < y1:
+                lines.append((x0, y0, x1, y1))
+
+    return PageLayout((canvas_w, canvas_h), (im_w, im_h), (x, y), tuple(lines))
+
+@lru_cache(maxsize=64)
+def plan_split_sheet(w_px, h_px):
+    """Layout used by process_sheet for a (valid) sheet of w_px × h_px."""
     w_in = w_px / dpi
     h_in = h_px / dpi
 
-    if not is_valid_sheet(w_in, h_in):
-        return False, f"Invalid size: {w_in:.2f}×{h_in:.2f} (not in approved list)"
-
-    if w_in > h_in:
-        split_vertical = True
-        half_w_in = w_in / 2
-        half_h_in = h_in
-        if w_px % 2 != 0:
-            w_px -= 1
-            img = img.crop((0, 0, w_px, h_px))
-        mid = w_px // 2
-        half1 = img.crop((0, 0, mid, h_px))
-        half2 = img.crop((mid, 0, w_px, h_px))
+    split_vertical = w_in > h_in
+    if split_vertical:
+        half_w_in, half_h_in = w_in / 2, h_in
     else:
-        split_vertical = False
-        half_w_in = w_in
-        half_h_in = h_in / 2
-        if h_px % 2 != 0:
-            h_px -= 1
-            img = img.crop((0, 0, w_px, h_px))
-        mid = h_px // 2
-        half1 = img.crop((0, 0, w_px, mid))
-        half2 = img.crop((0, mid, w_px, h_px))
+        half_w_in, half_h_in = w_in, h_in / 2
+    boxes = _split_boxes(w_px, h_px, split_vertical)
 
     # >>>>>>>>>>>> NEW LOGIC: Force 13x19 for 14x24, 15x24, 16x24 <<<<<<<<<<<<
     original_norm = normalize_size(w_in, h_in)
@@ -109,195 +184,310 @@ def process_sheet(image_path, output_folder):
     printable_w_px = target_w_px - 2 * margin_px
     printable_h_px = target_h_px
 
-    def resize_to_fit(im, max_w, max_h):
-        im_w, im_h = im.size
-        if im_w == 0 or im_h == 0:
-            return im
-        scale = min(max_w / im_w, max_h / im_h)
-        return im.resize((int(im_w * scale), int(im_h * scale)), Image.Resampling.LANCZOS)
-
-    half1_resized = resize_to_fit(half1, printable_w_px, printable_h_px)
-    half2_resized = resize_to_fit(half2, printable_w_px, printable_h_px)
-
-    def paste_centered(bg, im):
-        bg_w, bg_h = bg.size
-        im_w, im_h = im.size
-        x = (bg_w - im_w) // 2
-        y = (bg_h - im_h) // 2
-        bg.paste(im, (x, y))
-
-    canvas1 = Image.new("RGB", (target_w_px, target_h_px), (255, 255, 255))
-    canvas2 = Image.new("RGB", (target_w_px, target_h_px), (255, 255, 255))
-    paste_centered(canvas1, half1_resized)
-    paste_centered(canvas2, half2_resized)
-
-    base_name = os.path.splitext(os.path.basename(image_path))[0]
-    save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0}
-    canvas1.save(os.path.join(output_folder, f"{base_name}_page1.jpg"), **save_kwargs)
-    canvas2.save(os.path.join(output_folder, f"{base_name}_page2.jpg"), **save_kwargs)
-
-    return True, f"✅ Success: {paper_w}×{paper_h}\" pages"
-
-def crop_and_mark_sheet(image_path, output_folder):
-    """For 12x24 or 10x24 sheets: split vertically, place each half on 12x16 or 10x16 canvas with red margin lines."""
-    try:
-        img = Image.open(image_path).convert("RGB")
-    except Exception as e:
-        return False, f"Cannot open: {e}"
+    half_w = boxes[0][2] - boxes[0][0]
+    half_h = boxes[0][3] - boxes[0][1]
+    page = _page_layout(target_w_px, target_h_px, half_w, half_h, printable_w_px, printable_h_px)
+    return SheetPlan((paper_w, paper_h), split_vertical, boxes, page,
+                     _scaling(half_w, half_h, page.image_size))
 
-    w_px, h_px = img.size
+@lru_cache(maxsize=64)
+def plan_crop_mark_sheet(w_px, h_px):
+    """Layout used by crop_and_mark_sheet, or None if the paper size can't be determined."""
     w_in = w_px / dpi
     h_in = h_px / dpi
 
-    # Accept any orientation of 12x24 or 10x24
-    if not (
-        (abs(w_in - 12) < 0.1 and abs(h_in - 24) < 0.1) or   # 12x24
-        (abs(w_in - 24) < 0.1 and abs(h_in - 12) < 0.1) or   # 24x12
-        (abs(w_in - 10) < 0.1 and abs(h_in - 24) < 0.1) or   # 10x24
-        (abs(w_in - 24) < 0.1 and abs(h_in - 10) < 0.1)      # 24x10
-    ):
-        return False, f"Sheet {w_in:.2f}×{h_in:.2f}\" is not 12x24 or 10x24 — skipping."
-
     # Determine paper size
     if abs(w_in - 12) < 0.1 or abs(h_in - 12) < 0.1:
         paper_w, paper_h = 16, 12
     elif abs(w_in - 10) < 0.1 or abs(h_in - 10) < 0.1:
         paper_w, paper_h = 16, 10
     else:
-        return False, f"Cannot determine paper size"
+        return None
 
     target_w_px = int(paper_w * dpi)
     target_h_px = int(paper_h * dpi)
 
     # Split the sheet: always split the LONGER dimension
-    if w_in > h_in:
-        # Landscape (e.g., 24x12): split width → two 12x12 or 12x10
-        if w_px % 2 != 0:
-            w_px -= 1
-        mid = w_px // 2
-        half1 = img.crop((0, 0, mid, h_px))
-        half2 = img.crop((mid, 0, w_px, h_px))
-    else:
-        # Portrait (e.g., 12x24): split height → two 12x12 or 10x12
-        if h_px % 2 != 0:
-            h_px -= 1
-        mid = h_px // 2
-        half1 = img.crop((0, 0, w_px, mid))
-        half2 = img.crop((0, mid, w_px, h_px))
+    # Landscape (e.g., 24x12): split width → two 12x12 or 12x10
+    # Portrait (e.g., 12x24): split height → two 12x12 or 10x12
+    split_vertical = w_in > h_in
+    boxes = _split_boxes(w_px, h_px, split_vertical)
+
+    # Resize to fit within the target canvas (full height, constrained width),
+    # black margin lines at 1.0" from left/right edges of the image area
+    half_w = boxes[0][2] - boxes[0][0]
+    half_h = boxes[0][3] - boxes[0][1]
+    page = _page_layout(target_w_px, target_h_px, half_w, half_h, target_w_px, target_h_px,
+                        mark_margin_px=int(1.0 * dpi))
+    return SheetPlan((paper_w, paper_h), split_vertical, boxes, page,
+                     _scaling(half_w, half_h, page.image_size))
+
+def _render_half(img, box, plan, tier):
+    half = img.crop(box)
+    method, factor = plan.scaling
+    if method == "copy" or 0 in half.size:
+        return half
+    if method == "reduce":
+        return half.reduce(factor)
+    if tier != "print":
+        return resize(half, plan.page.image_size, tier)
+    start = perf_counter()
+    half = half.resize(plan.page.image_size, Image.Resampling.LANCZOS)
+    rate = (perf_counter() - start) / ((box[2] - box[0]) * (box[3] - box[1]))
+    with _lanczos_lock:
+        previous = _lanczos_rate[0]
+        _lanczos_rate[0] = rate if previous is None else 0.8 * previous + 0.2 * rate
+    return half
+
+def scaling_note(plan, seconds):
+    """
+    Message suffix for sheets shrunk with reduce() instead of LANCZOS, e.g.
+    " (fast path: reduce ×2, 0.21s vs ~0.90s)". Empty otherwise: a same-size
+    resize is a plain copy in Pillow too, so "copy" saves nothing to report.
+    """
+    method, factor = plan.scaling
+    if method != "reduce":
+        return ""
+    label = f"reduce ×{factor}"
+    rate = _lanczos_rate[0]
+    if rate is None:
+        return f" (fast path: {label}, {seconds:.2f}s)"
+    x0, y0, x1, y1 = plan.boxes[0]
+    estimate = rate * (x1 - x0) * (y1 - y0) * len(plan.boxes)
+    return f" (fast path: {label}, {seconds:.2f}s vs ~{estimate:.2f}s)"
+
+def plan_sheet(w_px, h_px, tool="split"):
+    """
+    Checks a sheet size for `tool` ("split" for process_sheet, "crop_mark" for
+    crop_and_mark_sheet). Returns (SheetPlan, None) or (None, error message).
+    """
+    w_in = w_px / dpi
+    h_in = h_px / dpi
 
-    results = []
-    for i, half in enumerate([half1, half2], 1):
-        # Resize to fit within the target canvas (full height, constrained width)
-        def resize_to_fit(im, max_w, max_h):
-            im_w, im_h = im.size
-            scale = min(max_w / im_w, max_h / im_h)
-            return im.resize((int(im_w * scale), int(im_h * scale)), Image.Resampling.LANCZOS)
+    if tool == "crop_mark":
+        # Accept any orientation of 12x24 or 10x24
+        if not (
+            (abs(w_in - 12) < 0.1 and abs(h_in - 24) < 0.1) or   # 12x24
+            (abs(w_in - 24) < 0.1 and abs(h_in - 12) < 0.1) or   # 24x12
+            (abs(w_in - 10) < 0.1 and abs(h_in - 24) < 0.1) or   # 10x24
+            (abs(w_in - 24) < 0.1 and abs(h_in - 10) < 0.1)      # 24x10
+        ):
+            return None, f"Sheet {w_in:.2f}×{h_in:.2f}\" is not 12x24 or 10x24 — skipping."
+        plan = plan_crop_mark_sheet(w_px, h_px)
+        if plan is None:
+            return None, f"Cannot determine paper size"
+        return plan, None
 
-        resized = resize_to_fit(half, target_w_px, target_h_px)
+    if not is_valid_sheet(w_in, h_in):
+        return None, f"Invalid size: {w_in:.2f}×{h_in:.2f} (not in approved list)"
+    return plan_split_sheet(w_px, h_px), None
 
-        # Create white canvas
-        canvas = Image.new("RGB", (target_w_px, target_h_px), (255, 255, 255))
+def render_pages(img, plan, timings=None, tier="print"):
+    """
+    Yields (page_number, canvas) for both halves of a decoded sheet.
+    Each canvas is a view on the worker's compositor buffer, so save (or
+    transform) it before asking for the next page. If `timings` is a list,
+    the crop + scale + compose seconds of each page are appended to it.
+    `tier` is the resampling tier of the scale step (see resample.py).
+    """
+    compositor = get_compositor()
+    for i, box in enumerate(plan.boxes, 1):
+        start = perf_counter()
+        # The compositor keeps the white border and margin lines of this layout
+        # between pages, only the image area is rewritten
+        canvas = compositor.compose(plan.page, _render_half(img, box, plan, tier))
+        if timings is not None:
+            timings.append(perf_counter() - start)
+        yield i, canvas
+
+def process_sheet(image_path, output_folder, page=None, rotate=False, sink=None):
+    """
+    Splits one sheet into two pages on the best-fitting paper. Pages are
+    written to output_folder, or handed to `sink` (a PDF/ZIP container, see
+    outputs.py) when given.
+    """
+    try:
+        img = open_sheet(image_path, page)
+    except Exception as e:
+        return False, f"Cannot open: {e}"
 
-        # Center image
-        x = (target_w_px - resized.width) // 2
-        y = (target_h_px - resized.height) // 2
-        canvas.paste(resized, (x, y))
+    plan, error = plan_sheet(*img.size)
+    if error:
+        return False, error
+    paper_w, paper_h = plan.paper
+
+    base_name = sheet_base_name(image_path, page)
+    save_kwargs = page_save_kwargs(img)
+    timings = []
+    pages = []
+    for i, canvas in render_pages(img, plan, timings, resample_tier("split")):
+        if rotate:
+            # Written already turned, so Rotate Pages doesn't have to rewrite it
+            canvas = canvas.transpose(page_rotation[i])
+        filename = f"{base_name}_page{i}.jpg"
+        if sink is None:
+            canvas.save(os.path.join(output_folder, filename), "JPEG", **save_kwargs)
+        else:
+            pages.append(encode_page(canvas, filename, save_kwargs))
+    if sink is not None:
+        sink.add_sheet((image_path, page), pages)
 
-        # Draw black margin lines at 1.0" from left/right edges of the image area
-        margin_px = int(1.0 * dpi)
-        draw = ImageDraw.Draw(canvas)
+    return True, f"✅ Success: {paper_w}×{paper_h}\" pages{scaling_note(plan, sum(timings))}"
 
-        left_line_x = x - margin_px 
-        right_line_x = x + resized.width + margin_px 
+def crop_and_mark_sheet(image_path, output_folder, page=None, sink=None):
+    """For 12x24 or 10x24 sheets: split vertically, place each half on 12x16 or 10x16 canvas with red margin lines.
+    `page` selects a page of a multi-page TIFF/PDF; `sink` works as in process_sheet."""
+    try:
+        img = open_sheet(image_path, page)
+    except Exception as e:
+        return False, f"Cannot open: {e}"
 
-        # Only draw if the image is wide enough to have distinct margins
-        if resized.width >= int(1.0 * dpi):  # at least 1" wide
-            draw.line([(left_line_x, y), (left_line_x, y + resized.height)], fill="Black", width=2)
-            draw.line([(right_line_x, y), (right_line_x, y + resized.height)], fill="Black", width=2)
+    plan, error = plan_sheet(*img.size, tool="crop_mark")
+    if error:
+        return False, error
 
+    results = []
+    timings = []
+    base_name = sheet_base_name(image_path, page)
+    save_kwargs = page_save_kwargs(img)
+    pages = []
+    for i, canvas in render_pages(img, plan, timings, resample_tier("crop_mark")):
         # Save
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
-        save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0}
         output_path = os.path.join(output_folder, f"{base_name}_page{i}.jpg")
-        canvas.save(output_path, **save_kwargs)
+        if sink is None:
+            canvas.save(output_path, "JPEG", **save_kwargs)
+        else:
+            pages.append(encode_page(canvas, os.path.basename(output_path), save_kwargs))
         results.append(output_path)
+    if sink is not None:
+        sink.add_sheet((image_path, page), pages)
+
+    return True, f"✅ Crop & Mark: {results[0]}, {results[1]}{scaling_note(plan, sum(timings))}"
 
-    return True, f"✅ Crop & Mark: {results[0]}, {results[1]}"
+def natural_key(name):
+    """Sort key that orders "page2" before "page10"."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+_page_suffix = re.compile(r"_page([12])$")
+
+def plan_rotation(filenames):
+    """
+    Returns [(filename, transpose method)] in natural order. Pages written by
+    process_sheet / crop_and_mark_sheet (..._page1, ..._page2) turn by their
+    page number; other files alternate left/right by their position among
+    the other files.
+    """
+    plan = []
+    position = 0
+    for filename in sorted(filenames, key=natural_key):
+        match = _page_suffix.search(os.path.splitext(filename)[0])
+        if match:
+            method = page_rotation[int(match.group(1))]
+        else:
+            position += 1
+            method = page_rotation[1] if position % 2 == 1 else page_rotation[2]
+        plan.append((filename, method))
+    return plan
+
+def rotate_image_file(file_path, method):
+    """
+    Rotates one image in place, keeping its format and quality. Returns (success, msg).
+    The rotated image replaces the file in one step, so an interrupted rotate
+    leaves the original untouched.
+    """
+    with Image.open(file_path) as img:
+        rotated = img.transpose(method)
 
-def rotate_images_in_folder(folder_path):
+        # Preserve format and quality
+        save_kwargs = {}
+        if img.format == 'JPEG':
+            save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0}
+        elif img.format == 'PNG':
+            save_kwargs = {"optimize": True}
+        elif img.format == 'TIFF':
+            save_kwargs = {"compression": img.info.get("compression", "raw")}
+            if getattr(img, "n_frames", 1) > 1:
+                # Every page of a multi-page TIFF turns the same way;
+                # all pages are decoded before the file is overwritten
+                others = []
+                for i in range(1, img.n_frames):
+                    img.seek(i)
+                    others.append(img.transpose(method))
+                save_kwargs.update(save_all=True, append_images=others)
+        if img.info.get("icc_profile"):
+            save_kwargs["icc_profile"] = img.info["icc_profile"]
+        file_format = img.format
+
+    tmp = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        rotated.save(tmp, format=file_format, **save_kwargs)
+        os.replace(tmp, file_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    direction = "left" if method == Image.ROTATE_90 else "right"
+    return True, f"Rotated {direction}"
+
+def rotate_images_in_folder(folder_path, workers=None, on_result=None):
     """
     Rotates images in a folder:
-    - Odd-numbered (1st, 3rd, ...) → 90° left (counter-clockwise)
-    - Even-numbered (2nd, 4th, ...) → 90° right (clockwise)
-    Overwrites original files.
+    - ..._page1 / ..._page2 files from Process → 90° left / 90° right
+    - other files in natural order: odd-numbered (1st, 3rd, ...) → 90° left,
+      even-numbered (2nd, 4th, ...) → 90° right
+    Overwrites original files, on the shared worker pool.
+    on_result(done, total, path, success, msg) is called as files finish.
     Returns (success_count, total_count, errors)
     """
-    image_extensions = {'.jpg', '.jpeg', '.png'}
-    files = [f for f in os.listdir(folder_path) if any(f.lower().endswith(ext) for ext in image_extensions)]
-    files.sort()  # Ensure consistent order (e.g., alphabetical)
+    entries = list_images(folder_path, extensions=image_extensions | {'.tif', '.tiff'}, recursive=False)
+    plan = plan_rotation(os.path.basename(e.path) for e in entries)
 
-    if not files:
+    if not plan:
         return 0, 0, ["No image files found."]
 
-    success_count = 0
-    errors = []
+    methods = {os.path.join(folder_path, filename): method for filename, method in plan}
 
-    for idx, filename in enumerate(files):
-        file_path = os.path.join(folder_path, filename)
-        try:
-            with Image.open(file_path) as img:
-                # Determine rotation
-                if (idx + 1) % 2 == 1:  # Odd position (1-based)
-                    rotated = img.transpose(Image.ROTATE_90)   # Counter-clockwise
-                else:  # Even position
-                    rotated = img.transpose(Image.ROTATE_270)  # Clockwise
+    def rotate_one(file_path, _output_folder):
+        return rotate_image_file(file_path, methods[file_path])
 
-                # Preserve format and quality
-                save_kwargs = {}
-                if img.format == 'JPEG':
-                    save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0}
-                elif img.format == 'PNG':
-                    save_kwargs = {"optimize": True}
+    results = run_batch(rotate_one, list(methods), folder_path, workers=workers, on_result=on_result)
+    errors = [f"{os.path.basename(path)}: {msg}" for path, success, msg in results if not success]
+    return len(results) - len(errors), len(results), errors
 
-                rotated.save(file_path, **save_kwargs)
-                success_count += 1
+def convert_to_300dpi(image_path, output_folder):
+    try:
+        with Image.open(image_path) as src:
+            # resize() returns an image without a format, keep the source's
+            fmt = src.format
 
-        except Exception as e:
-            errors.append(f"{filename}: {str(e)}")
+            # Get current DPI
+            current_dpi = src.info.get('dpi', (72, 72))
+            if isinstance(current_dpi, tuple):
+                current_dpi = current_dpi[0]
 
-    return success_count, len(files), errors
+            # Calculate physical size in inches
+            w_in = src.width / current_dpi
+            h_in = src.height / current_dpi
 
-def convert_to_300dpi(image_path, output_folder):
-    try:
-        img = Image.open(image_path)
-        
-        # Get current DPI
-        current_dpi = img.info.get('dpi', (72, 72))
-        if isinstance(current_dpi, tuple):
-            current_dpi = current_dpi[0]
-            
-        # Calculate physical size in inches
-        w_in = img.width / current_dpi
-        h_in = img.height / current_dpi
-        
-        # Calculate new pixel dimensions for 300 DPI
-        new_w = int(w_in * 300)
-        new_h = int(h_in * 300)
-        
-        # Resize
-        img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            # Calculate new pixel dimensions for 300 DPI
+            new_w = int(w_in * 300)
+            new_h = int(h_in * 300)
+
+            # Resize
+            img = resize(src, (new_w, new_h), resample_tier("fix_dpi"))
         
         # Save
         filename = os.path.basename(image_path)
         output_path = os.path.join(output_folder, filename)
         
         save_kwargs = {}
-        if img.format == 'JPEG':
+        if fmt == 'JPEG':
             save_kwargs = {"quality": 98, "optimize": True, "subsampling": 0, "dpi": (300, 300)}
-        elif img.format == 'PNG':
+        elif fmt == 'PNG':
              save_kwargs = {"optimize": True, "dpi": (300, 300)}
         else:
              save_kwargs = {"dpi": (300, 300)}
+        if img.info.get("icc_profile"):
+            save_kwargs["icc_profile"] = img.info["icc_profile"]
              
         img.save(output_path, **save_kwargs)
         return True, f"Converted {filename}"
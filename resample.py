@@ -0,0 +1,143 @@
+"""
+Resampling quality tiers.
+
+    draft      reduce() by an integer factor, then BILINEAR (proofs, checks)
+    standard   BICUBIC
+    print      LANCZOS (the default everywhere)
+
+Each tool has its own tier, saved under "resample" in gtcrop_config.json.
+Compare the tiers on sample sheets before choosing:
+
+    python resample.py compare <sheets...> [--tool split|crop_mark]
+"""
+import sys
+import argparse
+import threading
+from time import perf_counter
+
+import numpy as np
+from PIL import Image
+
+from config import load_config, update_config
+
+tiers = {
+    "draft": (Image.Resampling.BILINEAR, 2.0),  # (filter, reducing_gap)
+    "standard": (Image.Resampling.BICUBIC, None),
+    "print": (Image.Resampling.LANCZOS, None),
+}
+
+# Tools that resize, with their label in the GUI
+resample_tools = {"split": "Process", "crop_mark": "Crop & Mark", "fix_dpi": "Fix DPI"}
+
+default_tier = "print"
+
+_tiers = {}
+_lock = threading.Lock()
+
+
+def resample_tier(tool):
+    """The configured tier of `tool` (read from gtcrop_config.json once per session)."""
+    with _lock:
+        if not _tiers:
+            saved = load_config().get("resample", {})
+            for name in resample_tools:
+                tier = saved.get(name, default_tier)
+                _tiers[name] = tier if tier in tiers else default_tier
+        return _tiers.get(tool, default_tier)
+
+
+def set_resample_tier(tool, tier):
+    if tier not in tiers:
+        raise ValueError(f"Unknown resampling tier: {tier}")
+    resample_tier(tool)  # load the others first
+    with _lock:
+        _tiers[tool] = tier
+        saved = dict(_tiers)
+    update_config(resample=saved)
+
+
+def resize(img, size, tier=default_tier):
+    """img.resize() with the filter of `tier`."""
+    resample, reducing_gap = tiers[tier]
+    return img.resize(size, resample, reducing_gap=reducing_gap)
+
+
+# --- Comparison against the LANCZOS reference ---
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def _box_mean(x, k):
+    # Mean over k x k windows (valid area only) from a summed-area table
+    s = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def ssim(a, b, window=8):
+    """Mean SSIM of two grayscale arrays over window x window boxes."""
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box_mean(a, window), _box_mean(b, window)
+    var_a = _box_mean(a * a, window) - mu_a ** 2
+    var_b = _box_mean(b * b, window) - mu_b ** 2
+    cov = _box_mean(a * b, window) - mu_a * mu_b
+    s = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(s.mean())
+
+
+def compare_tiers(paths, tool="split"):
+    """
+    Renders every sample sheet with each tier. Returns {tier: (seconds per
+    sheet, PSNR dB, SSIM)}, quality measured on the luma of the pages
+    against the print (LANCZOS) tier.
+    """
+    from inputs import open_sheet
+    from processor import plan_sheet, render_pages
+
+    totals = {tier: [0.0, 0.0, 0.0, 0] for tier in tiers}
+    for path in paths:
+        img = open_sheet(path)
+        plan, error = plan_sheet(*img.size, tool=tool)
+        if error:
+            print(f"Skipping {path}: {error}")
+            continue
+        pages = {}
+        for tier in ("print",) + tuple(t for t in tiers if t != "print"):
+            start = perf_counter()
+            luma = [np.asarray(canvas.convert("L")) for _, canvas in render_pages(img, plan, tier=tier)]
+            seconds = perf_counter() - start
+            pages[tier] = luma
+            t = totals[tier]
+            t[0] += seconds
+            t[1] += np.mean([psnr(ref, p) for ref, p in zip(pages["print"], luma)])
+            t[2] += np.mean([ssim(ref, p) for ref, p in zip(pages["print"], luma)])
+            t[3] += 1
+    return {tier: (t[0] / t[3], t[1] / t[3], t[2] / t[3]) for tier, t in totals.items() if t[3]}
+
+
+def format_comparison(results):
+    lines = [f"{'Tier':<10}{'s/sheet':>9}{'PSNR dB':>10}{'SSIM':>8}"]
+    for tier in tiers:
+        if tier in results:
+            seconds, p, s = results[tier]
+            p = "ref" if tier == "print" else f"{p:.1f}"
+            lines.append(f"{tier:<10}{seconds:>9.2f}{p:>10}{s:>8.4f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GT Crop resampling tiers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("compare", help="time and quality of each tier on sample sheets")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--tool", choices=["split", "crop_mark"], default="split")
+    args = parser.parse_args(argv)
+    print(format_comparison(compare_tiers(args.files, tool=args.tool)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import os
+import stat
+import queue
+import fnmatch
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Extensions GT Crop can open as sheets
+image_extensions = {'.jpg', '.jpeg', '.png'}
+
+# One file found by the scanner
+ScanEntry = namedtuple("ScanEntry", ["path"])
+
+_DONE = object()
+
+
+def _file_key(path, is_link):
+    # Only links need resolving (an extra round trip per file on a share);
+    # any other file is reached under one path per listed folder
+    if is_link:
+        path = os.path.realpath(path)
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _dir_key(path):
+    # os.stat() (unlike DirEntry.stat() on Windows) fills st_ino, and it
+    # follows links and junctions, so a folder loop is seen as the same folder
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino) if st.st_ino else os.path.normcase(os.path.realpath(path))
+
+
+def _is_hidden(entry):
+    if entry.name.startswith('.'):
+        return True
+    if os.name != "nt":
+        return False
+    try:
+        attrs = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+    except OSError:
+        return False
+    return bool(attrs & stat.FILE_ATTRIBUTE_HIDDEN)
+
+
+def _matches(name, extensions, pattern):
+    lower = name.lower()
+    if extensions is not None and os.path.splitext(lower)[1] not in extensions:
+        return False
+    if pattern and not fnmatch.fnmatch(lower, pattern.lower()):
+        return False
+    return True
+
+
+def scan_images(paths, extensions=image_extensions, pattern=None, recursive=True,
+                include_hidden=False, workers=8):
+    """
+    Streams ScanEntry items for every image file under `paths`.
+
+    `paths` may be a single path or a list mixing files and folders (e.g. a
+    drag & drop payload). Sub-folders are listed in parallel threads, which
+    hides most of the per-request latency on SMB shares. Files reached twice
+    (symlinks, overlapping roots) are only yielded once, and symlinked folder
+    loops are not followed. Entries arrive in no particular order.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    if extensions is not None:
+        extensions = {ext.lower() for ext in extensions}
+
+    results = queue.Queue()
+    stop = threading.Event()
+    lock = threading.Lock()
+    seen_files = set()
+    seen_dirs = set()
+    pending = [1]  # the seeding pass below counts as one outstanding task
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="gtcrop-scan")
+
+    def emit(path, is_link):
+        key = _file_key(path, is_link)
+        with lock:
+            if key in seen_files:
+                return
+            seen_files.add(key)
+        results.put(ScanEntry(path))
+
+    def finish():
+        with lock:
+            pending[0] -= 1
+            last = pending[0] == 0
+        if last:
+            results.put(_DONE)
+
+    def submit(folder):
+        try:
+            key = _dir_key(folder)
+        except OSError:
+            return
+        with lock:
+            if key in seen_dirs:
+                return
+            seen_dirs.add(key)
+            pending[0] += 1
+        pool.submit(scan_dir, folder)
+
+    def scan_dir(folder):
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if stop.is_set():
+                        break
+                    if not include_hidden and _is_hidden(entry):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            if recursive:
+                                submit(entry.path)
+                        elif entry.is_file() and _matches(entry.name, extensions, pattern):
+                            emit(entry.path, entry.is_symlink())
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        finally:
+            finish()
+
+    try:
+        for path in paths:
+            path = os.fspath(path)
+            if os.path.isdir(path):
+                submit(path)
+            elif os.path.isfile(path) and _matches(os.path.basename(path), extensions, pattern):
+                # Explicitly chosen files are kept even if hidden
+                emit(path, os.path.islink(path))
+        finish()
+
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def list_images(paths, **kwargs):
+    """Same as scan_images() but collected into a list sorted by path."""
+    return sorted(scan_images(paths, **kwargs), key=lambda e: e.path)
@@ -4,7 +4,7 @@ from cx_Freeze import setup, Executable
 
 # Dependencies are automatically detected, but you may need to include some manually
 build_exe_options = {
-    "packages": ["PIL", "tkinter", "customtkinter", "tkinterdnd2"],
+    "packages": ["PIL", "tkinter", "customtkinter", "tkinterdnd2", "numpy", "pypdfium2"],
     "include_files": [
         "background.png",   # if used
         "gtcrop_config.json",  # optional: include default config
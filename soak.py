@@ -0,0 +1,346 @@
+"""
+Endurance (soak) test: runs ingestion, validation and processing over tens
+of thousands of synthetic sheets without the GUI and watches the process
+for leaks.
+
+    python soak.py [--sheets 20000] [--chunk 200] [--workers N] [--report soak_report]
+
+A small pool of synthetic sheets (JPEG, PNG, multi-page TIFF, a 72 DPI
+scan, one with an ICC profile, a truncated file, a wrong size, and a PDF
+when pypdfium2 is installed) is generated once and linked under fresh
+names for every chunk, so path-keyed state sees new sheets all the time.
+Each chunk goes through what a GUI session does with an album:
+
+    ingestion   list_pages + size check (Add Files / Add Folder)
+    validation  Album Validator: size, DPI, input check and duplicate hashes
+    processing  Process, Crop & Mark or One pass (in turn), some chunks into
+                a ZIP/PDF sink and some with verification
+
+then its inputs and outputs are deleted. After --warmup sheets, RSS, open
+files/handles and the Python object count are sampled every chunk. The run
+fails (exit code 1) if any of them ends more than its threshold above the
+post-warm-up baseline. soak_report.txt / .json are written for sign-off.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib.util
+import platform
+import tempfile
+from collections import Counter
+
+import numpy as np
+from PIL import Image, ImageCms
+
+from batch import run_batch, default_workers
+from inputs import list_pages, needs_dpi_fix
+from processor import process_sheet, crop_and_mark_sheet, is_valid_sheet, dpi
+from pipeline import run_pipeline
+from outputs import open_sink
+from valcache import ValidationCache
+from verify import Verifier, check_input
+import dupes
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Growth allowed over the baseline before the run fails
+default_max_rss_mb = 150
+default_max_handles = 20
+default_max_objects = 20000
+
+_tools = [
+    ("split", process_sheet),
+    ("crop_mark", crop_and_mark_sheet),
+    ("pipeline", run_pipeline),
+]
+
+
+# --- Process metrics ---
+
+def _windows_metrics():
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    counters = Counters()
+    counters.cb = ctypes.sizeof(counters)
+    ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+    handles = wintypes.DWORD()
+    ctypes.windll.kernel32.GetProcessHandleCount(process, ctypes.byref(handles))
+    return counters.WorkingSetSize, handles.value
+
+
+def process_metrics():
+    """(RSS bytes, open file descriptors / handles) of this process."""
+    if psutil is not None:
+        p = psutil.Process()
+        handles = p.num_handles() if sys.platform == "win32" else p.num_fds()
+        return p.memory_info().rss, handles
+    if sys.platform == "win32":
+        return _windows_metrics()
+    with open("/proc/self/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return rss, len(os.listdir("/proc/self/fd"))
+
+
+def object_counts():
+    """Live Python objects by type name, after a full collection."""
+    gc.collect()
+    return Counter(type(o).__name__ for o in gc.get_objects())
+
+
+# --- Synthetic sheets ---
+
+def _noise(w, h, seed):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (h // 60 + 1, w // 60 + 1, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize((w, h), Image.Resampling.BILINEAR)
+
+
+def make_pool(folder):
+    """Writes the synthetic sheets to `folder`, returns their file names."""
+    os.makedirs(folder, exist_ok=True)
+    names = []
+
+    def save(name, img, **kwargs):
+        img.save(os.path.join(folder, name), **kwargs)
+        names.append(name)
+
+    save("spread_12x24.jpg", _noise(12 * dpi, 24 * dpi, 1), quality=90, dpi=(dpi, dpi))
+    save("spread_10x24.jpg", _noise(24 * dpi, 10 * dpi, 2), quality=90, dpi=(dpi, dpi))
+    save("spread_12x18.png", _noise(12 * dpi, 18 * dpi, 3), dpi=(dpi, dpi), compress_level=1)
+    srgb = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    save("spread_icc.jpg", _noise(12 * dpi, 16 * dpi, 4), quality=90, dpi=(dpi, dpi), icc_profile=srgb)
+    save("spread_72dpi.jpg", _noise(12 * 72, 24 * 72, 5), quality=90, dpi=(72, 72))
+    pages = [_noise(12 * dpi, 24 * dpi, 6), _noise(12 * dpi, 24 * dpi, 7)]
+    save("album.tif", pages[0], save_all=True, append_images=pages[1:], compression="tiff_lzw", dpi=(dpi, dpi))
+    save("wrong_size.jpg", _noise(11 * dpi, 11 * dpi, 8), quality=90, dpi=(dpi, dpi))
+
+    path = os.path.join(folder, "truncated.jpg")
+    _noise(12 * dpi, 24 * dpi, 9).save(path, quality=90, dpi=(dpi, dpi))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+    names.append("truncated.jpg")
+
+    if importlib.util.find_spec("pypdfium2"):  # PDF input is optional
+        save("album.pdf", pages[0], resolution=dpi)
+    return names
+
+
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+# --- One chunk = one album through the app ---
+
+def run_chunk(index, pool_dir, names, work_dir, sheets, workers):
+    """Ingests, validates and processes `sheets` sheets. Returns {counter: n}."""
+    counts = Counter()
+    album = os.path.join(work_dir, f"album_{index:05d}")
+    output = os.path.join(work_dir, f"out_{index:05d}")
+    os.makedirs(album)
+    os.makedirs(output)
+    try:
+        # Ingestion: files get unique names, like a new album every time
+        items = []
+        files = []
+        n = 0
+        while len(items) < sheets:
+            name = names[n % len(names)]
+            path = os.path.join(album, f"{n:05d}_{name}")
+            _link(os.path.join(pool_dir, name), path)
+            files.append(path)
+            n += 1
+            try:
+                pages = list_pages(path)
+            except Exception:
+                counts["unreadable"] += 1
+                continue
+            for sheet in pages:
+                w_in, h_in = sheet.size[0] / dpi, sheet.size[1] / dpi
+                if is_valid_sheet(w_in, h_in):
+                    items.append(path if sheet.page is None else (path, sheet.page))
+                else:
+                    counts["invalid"] += 1
+
+        # Validation, as the Album Validator does it
+        for path in files:
+            try:
+                counts["dpi_fix"] += needs_dpi_fix(path)
+            except Exception:
+                counts["unreadable"] += 1
+            counts["input_problem"] += check_input(path) is not None
+        cache = ValidationCache(os.path.join(work_dir, "validation_cache.json"))
+        sheet_keys = [item if isinstance(item, tuple) else (item, None) for item in items]
+        hashes = dupes.hash_sheets(sheet_keys, cache, workers)
+        cache.save()
+        counts["duplicates"] += len(dupes.find_duplicates(hashes))
+
+        # Processing: the tools take turns, every third album into a container
+        tool, func = _tools[index % len(_tools)]
+        sink = open_sink(("zip", "pdf")[index // 3 % 2], output) if index % 3 == 2 else None
+        verifier = Verifier(tool=tool if tool != "pipeline" else None) if index % 2 else None
+        try:
+            results = run_batch(func, items, output, workers=workers, sink=sink, verifier=verifier)
+        finally:
+            if sink is not None:
+                sink.close()
+            if verifier is not None:
+                verifier.shutdown()
+        ok = sum(1 for _, success, _ in results if success)
+        counts["sheets"] += len(items)
+        counts["processed_ok"] += ok
+        counts["processed_failed"] += len(results) - ok
+    finally:
+        shutil.rmtree(album, ignore_errors=True)
+        shutil.rmtree(output, ignore_errors=True)
+    return counts
+
+
+# --- Run + report ---
+
+def _slope(xs, ys):
+    """Least-squares growth per sheet."""
+    if len(xs) < 2:
+        return 0.0
+    return float(np.polyfit(xs, ys, 1)[0])
+
+
+def run_soak(sheets=20000, chunk=200, warmup=None, workers=None, work_dir=None,
+             max_rss_mb=default_max_rss_mb, max_handles=default_max_handles,
+             max_objects=default_max_objects, on_sample=None):
+    """
+    Runs the soak and returns the report dict. Growth is the mean of the
+    last three samples minus the first sample after warm-up.
+    """
+    workers = workers or default_workers
+    # Six albums run every tool / sink / verify combination once, so the
+    # buffer pools and caches are at their working size by the baseline
+    warmup = chunk * 6 if warmup is None else warmup
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="gtcrop_soak_")
+    pool_dir = os.path.join(work_dir, "pool")
+    start = time.perf_counter()
+    try:
+        names = make_pool(pool_dir)
+        totals = Counter()
+        samples = []
+        baseline_types = None
+        done = 0
+        index = 0
+        while done < sheets:
+            counts = run_chunk(index, pool_dir, names, work_dir, min(chunk, sheets - done), workers)
+            totals.update(counts)
+            done += counts["sheets"]
+            index += 1
+            if done < warmup and done < sheets:
+                continue
+            types = object_counts()
+            if baseline_types is None:
+                baseline_types = types
+            rss, handles = process_metrics()
+            sample = {
+                "sheets": done, "seconds": round(time.perf_counter() - start, 1),
+                "rss_mb": round(rss / 2 ** 20, 1), "handles": handles, "objects": sum(types.values()),
+            }
+            samples.append(sample)
+            if on_sample:
+                on_sample(sample)
+        final_types = types
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    base = samples[0]
+    tail = samples[-3:]
+    checks = []
+    for key, limit in (("rss_mb", max_rss_mb), ("handles", max_handles), ("objects", max_objects)):
+        growth = sum(s[key] for s in tail) / len(tail) - base[key]
+        per_1000 = _slope([s["sheets"] for s in samples], [s[key] for s in samples]) * 1000
+        checks.append({"metric": key, "baseline": base[key], "growth": round(growth, 1),
+                       "per_1000_sheets": round(per_1000, 2), "limit": limit, "ok": growth <= limit})
+    growers = (final_types - baseline_types).most_common(10)
+
+    seconds = time.perf_counter() - start
+    return {
+        "passed": all(c["ok"] for c in checks),
+        "sheets": done, "seconds": round(seconds, 1),
+        "sheets_per_min": round(done / seconds * 60, 1) if seconds else 0.0,
+        "workers": workers, "chunk": chunk, "warmup": warmup,
+        "platform": platform.platform(), "python": platform.python_version(),
+        "pillow": Image.__version__, "metrics_source": "psutil" if psutil else "os",
+        "counts": dict(totals), "checks": checks,
+        "growing_types": growers, "samples": samples,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"GT Crop soak test: {'PASSED' if report['passed'] else 'FAILED'}",
+        f"{report['sheets']} sheets in {report['seconds']:.0f}s ({report['sheets_per_min']} sheets/min), "
+        f"{report['workers']} workers, chunks of {report['chunk']}, warm-up {report['warmup']}",
+        f"{report['platform']}, Python {report['python']}, Pillow {report['pillow']}",
+        "",
+        f"{'Metric':<10}{'Baseline':>12}{'Growth':>12}{'Per 1000':>12}{'Limit':>10}",
+    ]
+    for c in report["checks"]:
+        lines.append(f"{c['metric']:<10}{c['baseline']:>12}{c['growth']:>12}{c['per_1000_sheets']:>12}"
+                     f"{c['limit']:>10}  {'ok' if c['ok'] else 'FAIL'}")
+    lines += ["", "Counts: " + ", ".join(f"{k} {v}" for k, v in sorted(report["counts"].items()))]
+    if report["growing_types"]:
+        lines += ["", "Object types that grew since the baseline:"]
+        lines += [f"   {name}: +{n}" for name, n in report["growing_types"]]
+    lines += ["", f"{'Sheets':>8}{'Seconds':>10}{'RSS MB':>10}{'Handles':>9}{'Objects':>10}"]
+    for s in report["samples"]:
+        lines.append(f"{s['sheets']:>8}{s['seconds']:>10}{s['rss_mb']:>10}{s['handles']:>9}{s['objects']:>10}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GT Crop endurance (soak) test")
+    parser.add_argument("--sheets", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=200, help="sheets per album (one sample each)")
+    parser.add_argument("--warmup", type=int, help="sheets before the baseline (default: six chunks)")
+    parser.add_argument("--workers", type=int, default=default_workers)
+    parser.add_argument("--work-dir", help="scratch folder (default: a temporary one)")
+    parser.add_argument("--report", default="soak_report", help="report path without extension")
+    parser.add_argument("--max-rss-mb", type=float, default=default_max_rss_mb)
+    parser.add_argument("--max-handles", type=int, default=default_max_handles)
+    parser.add_argument("--max-objects", type=int, default=default_max_objects)
+    args = parser.parse_args(argv)
+
+    def on_sample(s):
+        print(f"{s['sheets']:>7} sheets  {s['seconds']:>8}s  RSS {s['rss_mb']} MB  "
+              f"handles {s['handles']}  objects {s['objects']}", flush=True)
+
+    report = run_soak(args.sheets, args.chunk, args.warmup, args.workers, args.work_dir,
+                      args.max_rss_mb, args.max_handles, args.max_objects, on_sample)
+    text = format_report(report)
+    with open(args.report + ".txt", "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    with open(args.report + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print()
+    print(text.split("\n\nCounts")[0])
+    print(f"\nReport: {args.report}.txt, {args.report}.json")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
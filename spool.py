@@ -0,0 +1,353 @@
+"""
+Shared job spool for running one batch on several workstations.
+
+The spool is a plain folder (usually on the same share as the albums):
+
+    pending/   jobs waiting for a worker, one JSON file per sheet
+    active/    jobs leased by a worker; the file's mtime is the heartbeat
+    done/      finished jobs with their result message
+    failed/    jobs that used up their attempts
+    nodes/     per-worker throughput stats
+
+A worker claims a job by renaming it from pending/ to active/; rename is
+atomic, so exactly one worker wins. A lease that isn't refreshed within
+`lease_timeout` seconds (worker crashed, PC switched off) is put back in
+pending/ by whichever worker notices first.
+
+Sheet and output paths are stored as given, so on several PCs use paths that
+resolve the same everywhere (UNC paths or identical drive mappings).
+
+    python spool.py enqueue <spool> <output_folder> <files...> [--tool split|crop_mark|pipeline]
+    python spool.py worker <spool> [--threads N] [--exit-when-idle]
+    python spool.py status <spool>
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+
+from processor import process_sheet, crop_and_mark_sheet
+from pipeline import run_pipeline
+
+tools = {
+    "split": process_sheet,
+    "crop_mark": crop_and_mark_sheet,
+    "pipeline": run_pipeline,
+}
+
+_states = ("pending", "active", "done", "failed", "nodes")
+
+default_lease_timeout = 120  # seconds without heartbeat before a job is re-queued
+default_max_attempts = 3
+
+
+def init_spool(spool_dir):
+    for state in _states:
+        os.makedirs(os.path.join(spool_dir, state), exist_ok=True)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    # Write next to the target and rename, readers never see half a file
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def enqueue(spool_dir, items, output_folder, tool="split", max_attempts=default_max_attempts):
+    """
+    Adds one job per sheet. `items` are paths or (path, page) pairs.
+    Job files sort in enqueue order, so workers take sheets roughly in album order.
+    Returns the job ids.
+    """
+    if tool not in tools:
+        raise ValueError(f"Unknown tool: {tool}")
+    init_spool(spool_dir)
+    ids = []
+    for item in items:
+        path, page = item if isinstance(item, tuple) else (item, None)
+        job_id = f"{time.time_ns():020d}_{uuid.uuid4().hex[:8]}"
+        job = {
+            "id": job_id,
+            "tool": tool,
+            "path": path,
+            "page": page,
+            "output_folder": output_folder,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "enqueued": time.time(),
+            "error": None,
+        }
+        tmp = os.path.join(spool_dir, "pending", f".{job_id}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.rename(tmp, os.path.join(spool_dir, "pending", f"{job_id}.json"))
+        ids.append(job_id)
+    return ids
+
+
+def reap_expired(spool_dir, lease_timeout=default_lease_timeout):
+    """Puts jobs whose lease ran out back in pending/ (or failed/ when out of attempts)."""
+    active_dir = os.path.join(spool_dir, "active")
+    now = time.time()
+    requeued = 0
+    for name in os.listdir(active_dir):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(active_dir, name)
+        try:
+            if now - os.path.getmtime(path) < lease_timeout:
+                continue
+            # Claim the expired lease first so two reapers don't both requeue it
+            reaped = f"{path}.reap"
+            os.rename(path, reaped)
+        except OSError:
+            continue
+        try:
+            job = _read_json(reaped)
+            job["attempts"] += 1
+            job["error"] = f"Lease expired on {job.get('node', '?')}"
+            state = "pending" if job["attempts"] < job["max_attempts"] else "failed"
+            _write_json(os.path.join(spool_dir, state, name), job)
+            os.remove(reaped)
+            requeued += 1
+        except (OSError, ValueError):
+            continue
+    return requeued
+
+
+def claim(spool_dir, node):
+    """Leases the oldest pending job for `node`. Returns (job, active_path) or (None, None)."""
+    pending_dir = os.path.join(spool_dir, "pending")
+    for name in sorted(n for n in os.listdir(pending_dir) if n.endswith(".json")):
+        active_path = os.path.join(spool_dir, "active", name)
+        try:
+            os.rename(os.path.join(pending_dir, name), active_path)
+        except OSError:
+            continue  # another worker got it
+        try:
+            job = _read_json(active_path)
+        except (OSError, ValueError):
+            os.replace(active_path, os.path.join(spool_dir, "failed", name))
+            continue
+        job["node"] = node
+        job["leased"] = time.time()
+        job["lease"] = uuid.uuid4().hex[:8]  # tells this lease from a later one of the same job
+        _write_json(active_path, job)
+        return job, active_path
+    return None, None
+
+
+def _holds_lease(path, job):
+    try:
+        return _read_json(path).get("lease") == job["lease"]
+    except (OSError, ValueError):
+        return False
+
+
+def _finish(spool_dir, job, active_path, success, msg):
+    """
+    Records the result of a leased job. Returns False, recording nothing,
+    when the lease was reaped meanwhile: the job is back in pending/ or
+    leased by another worker, whose active file stays where it is.
+    """
+    name = os.path.basename(active_path)
+    if not _holds_lease(active_path, job):
+        return False
+    # Take the active file like reap_expired does, so the two can't both move it
+    finishing = f"{active_path}.{job['lease']}.finish"
+    try:
+        os.rename(active_path, finishing)
+    except OSError:
+        return False  # reaped between the check and the rename
+    if not _holds_lease(finishing, job):
+        # Reaped and claimed again in that window: not ours, put it back
+        try:
+            os.rename(finishing, active_path)
+        except OSError:
+            pass
+        return False
+
+    job["finished"] = time.time()
+    if success:
+        job["result"] = msg
+        state = "done"
+    else:
+        job["attempts"] += 1
+        job["error"] = msg
+        state = "pending" if job["attempts"] < job["max_attempts"] else "failed"
+    _write_json(os.path.join(spool_dir, state, name), job)
+    try:
+        os.remove(finishing)
+    except OSError:
+        pass
+    return True
+
+
+def run_job(job):
+    func = tools[job["tool"]]
+    try:
+        if job.get("page") is None:
+            return func(job["path"], job["output_folder"])
+        return func(job["path"], job["output_folder"], page=job["page"])
+    except Exception as e:
+        return False, f"Error: {e}"
+
+
+class NodeStats:
+    """Throughput of one worker process, written to nodes/<node>.json."""
+
+    def __init__(self, spool_dir, node):
+        self.path = os.path.join(spool_dir, "nodes", f"{node}.json")
+        self.node = node
+        self.started = time.time()
+        self.ok = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, success, seconds):
+        with self._lock:
+            if success:
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.busy_seconds += seconds
+            data = self.snapshot()
+        try:
+            _write_json(self.path, data)
+        except OSError:
+            pass
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return {
+            "node": self.node,
+            "ok": self.ok,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "sheets_per_min": round(60 * (self.ok + self.failed) / elapsed, 2),
+            "last_seen": time.time(),
+        }
+
+
+def run_worker(spool_dir, node=None, threads=1, lease_timeout=default_lease_timeout,
+               poll_interval=2.0, stop_event=None, exit_when_idle=False, on_result=None):
+    """
+    Claims and runs jobs until `stop_event` is set (or, with exit_when_idle,
+    until the spool has nothing left to claim). `threads` claim loops run
+    side by side in this process. on_result(job, success, msg) is called
+    after every job. Returns the NodeStats of this worker.
+    """
+    init_spool(spool_dir)
+    node = node or f"{socket.gethostname()}-{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+    stats = NodeStats(spool_dir, node)
+
+    def heartbeat(active_path, done):
+        # Touch the lease well inside the timeout while the sheet is processed
+        while not done.wait(lease_timeout / 4):
+            try:
+                os.utime(active_path)
+            except OSError:
+                return
+
+    def loop():
+        while not stop_event.is_set():
+            reap_expired(spool_dir, lease_timeout)
+            job, active_path = claim(spool_dir, node)
+            if job is None:
+                if exit_when_idle and not os.listdir(os.path.join(spool_dir, "active")):
+                    return
+                stop_event.wait(poll_interval)
+                continue
+
+            done = threading.Event()
+            threading.Thread(target=heartbeat, args=(active_path, done), daemon=True).start()
+            start = time.time()
+            success, msg = run_job(job)
+            done.set()
+            if not _finish(spool_dir, job, active_path, success, msg):
+                msg = f"{msg} (lease expired, result not recorded)"
+            stats.record(success, time.time() - start)
+            if on_result:
+                on_result(job, success, msg)
+
+    workers = [threading.Thread(target=loop, daemon=True) for _ in range(max(1, threads))]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return stats
+
+
+def spool_status(spool_dir):
+    """Job counts per state plus the stats of every node that reported."""
+    counts = {}
+    for state in ("pending", "active", "done", "failed"):
+        folder = os.path.join(spool_dir, state)
+        counts[state] = len([n for n in os.listdir(folder) if n.endswith(".json")]) if os.path.isdir(folder) else 0
+    nodes = []
+    nodes_dir = os.path.join(spool_dir, "nodes")
+    if os.path.isdir(nodes_dir):
+        for name in sorted(os.listdir(nodes_dir)):
+            if name.endswith(".json"):
+                try:
+                    nodes.append(_read_json(os.path.join(nodes_dir, name)))
+                except (OSError, ValueError):
+                    pass
+    return counts, nodes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GT Crop shared job spool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enqueue", help="queue sheets for processing")
+    p.add_argument("spool")
+    p.add_argument("output_folder")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--tool", choices=sorted(tools), default="split")
+
+    p = sub.add_parser("worker", help="claim and process queued sheets")
+    p.add_argument("spool")
+    p.add_argument("--node")
+    p.add_argument("--threads", type=int, default=1)
+    p.add_argument("--lease-timeout", type=float, default=default_lease_timeout)
+    p.add_argument("--exit-when-idle", action="store_true")
+
+    p = sub.add_parser("status", help="show queue and node stats")
+    p.add_argument("spool")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        ids = enqueue(args.spool, args.files, args.output_folder, tool=args.tool)
+        print(f"Queued {len(ids)} sheet(s)")
+    elif args.command == "worker":
+        def on_result(job, success, msg):
+            print(f"{os.path.basename(job['path'])}: {msg}")
+        try:
+            stats = run_worker(args.spool, node=args.node, threads=args.threads,
+                               lease_timeout=args.lease_timeout,
+                               exit_when_idle=args.exit_when_idle, on_result=on_result)
+            print(json.dumps(stats.snapshot()))
+        except KeyboardInterrupt:
+            pass
+    else:
+        counts, nodes = spool_status(args.spool)
+        print(json.dumps({"jobs": counts, "nodes": nodes}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import threading
+import tkinter
+
+
+class UIBus:
+    """
+    Mailbox between worker threads and the Tk GUI.
+
+    Workers publish() from any thread; the GUI thread drains the bus every
+    `interval_ms` and hands each subscriber everything that arrived since the
+    last drain in one go, so hundreds of events per second cost a handful of
+    widget updates:
+    - a plain subscriber gets only the latest value of its topic (progress,
+      status text),
+    - a batch subscriber gets the list of all values (per-file results).
+    call() runs a function on the GUI thread after the pending updates.
+
+    One bus is shared by every window; topics are plain strings, prefixed
+    with the window they belong to.
+    """
+
+    def __init__(self, root, interval_ms=100):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.published = 0
+        self.delivered = 0
+        self._lock = threading.Lock()
+        self._subscribers = {}  # topic -> (callback, batch)
+        self._latest = {}
+        self._batches = {}
+        self._calls = []
+        self._after_id = root.after(interval_ms, self._drain)
+
+    def subscribe(self, topic, callback, batch=False):
+        with self._lock:
+            self._subscribers[topic] = (callback, batch)
+
+    def unsubscribe(self, topic):
+        with self._lock:
+            self._subscribers.pop(topic, None)
+            self._latest.pop(topic, None)
+            self._batches.pop(topic, None)
+
+    def publish(self, topic, value):
+        with self._lock:
+            subscriber = self._subscribers.get(topic)
+            if subscriber is None:
+                return
+            self.published += 1
+            if subscriber[1]:
+                self._batches.setdefault(topic, []).append(value)
+            else:
+                self._latest[topic] = value
+
+    def call(self, func, *args):
+        with self._lock:
+            self._calls.append((func, args))
+
+    def _drain(self):
+        try:
+            with self._lock:
+                updates = list(self._latest.items()) + list(self._batches.items())
+                self._latest, self._batches = {}, {}
+                calls, self._calls = self._calls, []
+                subscribers = dict(self._subscribers)
+
+            for topic, value in updates:
+                if topic not in subscribers:
+                    continue
+                try:
+                    subscribers[topic][0](value)
+                    self.delivered += 1
+                except tkinter.TclError:
+                    self.unsubscribe(topic)  # its window was closed
+                except Exception as e:
+                    print(f"UI update for {topic} failed: {e}")
+
+            for func, args in calls:
+                try:
+                    func(*args)
+                except tkinter.TclError:
+                    pass
+                except Exception as e:
+                    print(f"UI call {getattr(func, '__name__', func)} failed: {e}")
+        finally:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
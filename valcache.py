@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+
+cache_file = "gtcrop_validation_cache.json"
+
+default_max_age_days = 90     # records not used for this long are dropped
+default_max_records = 20000   # beyond this the least recently used go first
+default_sweep_hours = 24      # how often saves look for deleted sheets
+
+
+class ValidationCache:
+    """
+    Per-sheet results of the Album Validator (hashes, checks), saved in
+    gtcrop_validation_cache.json. A record is keyed by sheet (path + page)
+    and only trusted while the file's mtime and size are unchanged, so an
+    edited or replaced sheet is simply checked again.
+
+    Every save drops the records that weren't used for max_age_days and
+    keeps at most max_records, so the file stays bounded however many albums
+    go through the validator. Records of sheets that no longer exist are
+    swept at most every sweep_hours: that stats every cached path, mostly
+    on the share, so it isn't done on each validation.
+    """
+
+    def __init__(self, path=cache_file, max_age_days=default_max_age_days, max_records=default_max_records,
+                 sweep_hours=default_sweep_hours):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_records = max_records
+        self.sweep_hours = sweep_hours
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._swept = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if isinstance(data.get("records"), dict):
+            self._records = data["records"]
+            self._swept = data.get("swept", 0)
+        else:
+            self._records = data  # saved before the sweep was dated: keys only
+        now = int(time.time())
+        for record in self._records.values():
+            record.setdefault("seen", now)  # saved before records were dated
+
+    @staticmethod
+    def _key(path, page):
+        path = os.path.normcase(os.path.abspath(path))
+        return path if page is None else f"{path}#{page}"
+
+    @staticmethod
+    def _path_of(key):
+        path, _, page = key.rpartition("#")
+        return path if page.isdigit() else key
+
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+
+    def get(self, path, page=None, field=None):
+        """The cached record (or one field of it), None if missing or stale."""
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return None
+        with self._lock:
+            record = self._records.get(self._key(path, page))
+            if not record or record.get("sig") != signature:
+                return None
+            record["seen"] = int(time.time())
+            self._dirty = True
+        return record if field is None else record.get(field)
+
+    def put(self, path, page=None, **fields):
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return
+        key = self._key(path, page)
+        with self._lock:
+            record = self._records.get(key)
+            if not record or record.get("sig") != signature:
+                record = self._records[key] = {"sig": signature}
+            record.update(fields)
+            record["seen"] = int(time.time())
+            self._dirty = True
+
+    def prune(self, sweep=False):
+        """
+        Drops unused and surplus records, and with `sweep` those of deleted
+        sheets. Returns how many went.
+        """
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock:
+            records = list(self._records.items())
+        exists = {}
+        keep = []
+        for key, record in records:
+            if record.get("seen", 0) < cutoff:
+                continue
+            if sweep:
+                path = self._path_of(key)
+                if path not in exists:
+                    exists[path] = os.path.exists(path)
+                if not exists[path]:
+                    continue
+            keep.append((record.get("seen", 0), key))
+        keep = {key for _, key in sorted(keep, reverse=True)[:self.max_records]}
+        with self._lock:
+            # Records added while the files were checked stay
+            stale = [key for key, _ in records if key not in keep and key in self._records]
+            for key in stale:
+                del self._records[key]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def save(self):
+        sweep = time.time() - self._swept > self.sweep_hours * 3600
+        self.prune(sweep)
+        with self._lock:
+            if sweep:
+                self._swept = int(time.time())
+                self._dirty = True
+            if not self._dirty:
+                return
+            data = json.dumps({"swept": self._swept, "records": self._records})
+            self._dirty = False
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+import os
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from inputs import list_pages, sheet_base_name
+from processor import plan_sheet
+
+# processor sets ImageFile.LOAD_TRUNCATED_IMAGES, so a cut-off JPEG decodes
+# "fine" with a gray band; the end markers are what give it away
+_end_markers = {"JPEG": b"\xff\xd9", "PNG": b"IEND\xaeB`\x82"}
+
+
+def _truncated(path, fmt):
+    marker = _end_markers.get(fmt)
+    if marker is None:
+        return False
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64))
+        tail = f.read()
+    # Some scanners pad JPEGs with zeros after the EOI
+    return not tail.rstrip(b"\x00").endswith(marker)
+
+
+def check_input(path):
+    """Problem with a source sheet file (None if fine). Only the file's end is read."""
+    try:
+        with Image.open(path) as img:
+            fmt = img.format
+        if _truncated(path, fmt):
+            return "input truncated"
+    except Exception as e:
+        return f"input unreadable: {e}"
+    return None
+
+
+def check_output(path, expected_size=None):
+    """
+    Problem with a written page (None if fine): missing or empty, wrong
+    dimensions (either orientation accepted), no end marker, or not
+    decodable. The decode is a 1/8 scale draft, a few ms per page.
+    """
+    name = os.path.basename(path)
+    try:
+        if os.path.getsize(path) == 0:
+            return f"{name} is empty"
+        with Image.open(path) as img:
+            if expected_size and img.size not in (tuple(expected_size), tuple(expected_size)[::-1]):
+                return f"{name} is {img.width}×{img.height}, expected {expected_size[0]}×{expected_size[1]}"
+            if _truncated(path, img.format):
+                return f"{name} is truncated"
+            img.draft("RGB", (img.width // 8, img.height // 8))
+            img.load()
+    except FileNotFoundError:
+        return f"{name} is missing"
+    except Exception as e:
+        return f"{name} can't be decoded: {e}"
+    return None
+
+
+class Verifier:
+    """
+    Post-write checks for a batch, on a small pool of its own so they run
+    while the workers render the next sheets. run_batch(verifier=...)
+    submits every sheet that reports success and turns the ones with a
+    problem into failures. `tool` ("split" / "crop_mark") gives the
+    expected page size; None skips the size check (one-pass mode, whose
+    Fix DPI step changes the sheet size).
+    """
+
+    def __init__(self, tool="split", workers=2):
+        self.tool = tool
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gtcrop-verify")
+        self._lock = threading.Lock()
+        self.sheets = 0
+        self.pages = 0
+        self.problems = 0
+        self.seconds = 0.0
+        self.drain_seconds = 0.0
+
+    def submit(self, path, page, output_folder):
+        """Future resolving to a problem description, or None."""
+        return self.executor.submit(self._verify, path, page, output_folder)
+
+    def _verify(self, path, page, output_folder):
+        start = perf_counter()
+        problems = []
+        problem = check_input(path) if page is None else None
+        if problem:
+            problems.append(problem)
+
+        expected = None
+        if self.tool:
+            size = next((s.size for s in list_pages(path) if s.page == page), None)
+            plan = plan_sheet(*size, tool=self.tool)[0] if size else None
+            expected = plan.page.canvas_size if plan else None
+
+        base_name = sheet_base_name(path, page)
+        pages = 0
+        for i in (1, 2):
+            pages += 1
+            problem = check_output(os.path.join(output_folder, f"{base_name}_page{i}.jpg"), expected)
+            if problem:
+                problems.append(problem)
+
+        with self._lock:
+            self.sheets += 1
+            self.pages += pages
+            self.problems += bool(problems)
+            self.seconds += perf_counter() - start
+        return "; ".join(problems) or None
+
+    def wait(self, futures):
+        """Waits for the remaining checks after rendering is done ({index: future} -> {index: problem})."""
+        start = perf_counter()
+        problems = {index: future.result() for index, future in futures.items()}
+        self.drain_seconds += perf_counter() - start
+        return problems
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def summary(self):
+        return (
+            f"Verify: {self.sheets} sheets / {self.pages} pages checked, {self.problems} with problems, "
+            f"{self.seconds:.1f}s of checking, {self.drain_seconds:.1f}s added after rendering"
+        )